@@ -1,23 +1,24 @@
-import csv
+import argparse
+import sys
 from pathlib import Path
 
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for strats.chart_cache
+from strats import chart_cache
+
+SWEEP_COLUMNS = ("N", "M", "M_profit", "Iterations", "Prob_Win", "Expected_Return")
+
 
 def _load_rows(path):
-    with open(path, newline="") as f:
-        return list(csv.DictReader(f))
+    # Numeric columns, parsed once and then loaded from .chart_cache/*.npz
+    return chart_cache.load_columns(path, SWEEP_COLUMNS)
 
 
 def _to_points(rows, x_key, y_key):
-    points = []
-    for row in rows:
-        if x_key not in row and x_key == "M_profit" and "M" in row:
-            x = float(row["M"])
-        else:
-            x = float(row[x_key])
-        y = float(row[y_key])
-        points.append((x, y))
+    if x_key not in rows and x_key == "M_profit" and "M" in rows:
+        x_key = "M"
+    points = [(float(x), float(y)) for x, y in zip(rows[x_key], rows[y_key])]
     points.sort(key=lambda p: p[0])
     return points
 
@@ -26,7 +27,7 @@ def _plot_line(points, title, x_label, y_label, out_path):
     xs = [p[0] for p in points]
     ys = [p[1] for p in points]
     plt.figure(figsize=(10, 6))
-    plt.plot(xs, ys, linewidth=2.0)
+    plt.plot(xs, ys, linewidth=2.0, **_marker(points))
     plt.title(title)
     plt.xlabel(x_label)
     plt.ylabel(y_label)
@@ -36,35 +37,50 @@ def _plot_line(points, title, x_label, y_label, out_path):
     plt.close()
 
 
+def _marker(points):
+    # Adaptive sweeps (sweeper.py --sweep-mode adaptive) sample unevenly; mark where the points are
+    gaps = [b[0] - a[0] for a, b in zip(points, points[1:])]
+    if gaps and max(gaps) > 2 * min(gaps):
+        return {"marker": "o", "markersize": 3}
+    return {}
+
+
 def _infer_iterations(rows):
-    if not rows:
-        return None
-    sample = rows[0].get("Iterations")
-    if sample is None:
-        return None
-    try:
-        return int(float(sample))
-    except ValueError:
+    sample = rows.get("Iterations")
+    if sample is None or not len(sample):
         return None
+    return int(sample[0])
+
+
+def _render_line(path, x_key, y_key, title, x_label, y_label, out_path):
+    _plot_line(_to_points(_load_rows(path), x_key, y_key), title, x_label, y_label, out_path)
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Chart a fixed-M and a fixed-N sweep.")
+    parser.add_argument("paths", nargs="*")  # fixed_M and fixed_N tables (.csv or .npz), e.g. fixed_M_80_1000_adaptive.csv fixed_N_256_1000_adaptive.csv
+    parser.add_argument("--force", action="store_true")  # Redraw even if the sweep files didn't change
+    parser.add_argument("--workers", type=int, default=None)  # Processes for rendering (default: one per chart)
+    args = parser.parse_args()
+
     base_dir = Path(__file__).resolve().parent
     fixed_m_path = base_dir / "fixed_M_80_profit.csv"
     fixed_n_path = base_dir / "fixed_N_256_profit.csv"
+    if len(args.paths) > 1:
+        fixed_m_path, fixed_n_path = Path(args.paths[0]), Path(args.paths[1])
     out_dir = base_dir / "charts"
     out_dir.mkdir(exist_ok=True)
 
     if not fixed_m_path.exists():
-        candidates = sorted(base_dir.glob("fixed_M_*_*.csv"))
+        candidates = sorted([*base_dir.glob("fixed_M_*_*.csv"), *base_dir.glob("fixed_M_*_*.npz")])
         if not candidates:
-            raise FileNotFoundError(f"No fixed_M_*_*.csv files found in {base_dir}")
+            raise FileNotFoundError(f"No fixed_M_*_*.csv or .npz files found in {base_dir}")
         fixed_m_path = candidates[-1]
 
     if not fixed_n_path.exists():
-        candidates = sorted(base_dir.glob("fixed_N_*_*.csv"))
+        candidates = sorted([*base_dir.glob("fixed_N_*_*.csv"), *base_dir.glob("fixed_N_*_*.npz")])
         if not candidates:
-            raise FileNotFoundError(f"No fixed_N_*_*.csv files found in {base_dir}")
+            raise FileNotFoundError(f"No fixed_N_*_*.csv or .npz files found in {base_dir}")
         fixed_n_path = candidates[-1]
 
     rows_fixed_m = _load_rows(fixed_m_path)
@@ -73,47 +89,36 @@ def main():
     iterations = _infer_iterations(rows_fixed_m) or _infer_iterations(rows_fixed_n)
     iter_suffix = f" (Iterations: {iterations})" if iterations is not None else ""
 
-    # 1) M fixed at 80: Prob_Win vs N
-    pts = _to_points(rows_fixed_m, "N", "Prob_Win")
-    _plot_line(
-        pts,
-        f"Probability of Winning vs N (M fixed at 80){iter_suffix}",
-        "Initial Balance N ($)",
-        "Probability of Winning",
-        out_dir / "prob_win_vs_N_fixed_M80.png",
-    )
-
-    # 2) N fixed at 256: Prob_Win vs M
-    pts = _to_points(rows_fixed_n, "M_profit", "Prob_Win")
-    _plot_line(
-        pts,
-        f"Probability of Winning vs M (N fixed at 256){iter_suffix}",
-        "Target Profit M ($)",
-        "Probability of Winning",
-        out_dir / "prob_win_vs_M_fixed_N256.png",
-    )
-
-    # 3) M fixed at 80: Expected Return vs N
-    pts = _to_points(rows_fixed_m, "N", "Expected_Return")
-    _plot_line(
-        pts,
-        f"Expected Return vs N (M fixed at 80){iter_suffix}",
-        "Initial Balance N ($)",
-        "Expected Return ($)",
-        out_dir / "expected_return_vs_N_fixed_M80.png",
-    )
-
-    # 4) N fixed at 256: Expected Return vs M
-    pts = _to_points(rows_fixed_n, "M_profit", "Expected_Return")
-    _plot_line(
-        pts,
-        f"Expected Return vs M (N fixed at 256){iter_suffix}",
-        "Target Profit M ($)",
-        "Expected Return ($)",
-        out_dir / "expected_return_vs_M_fixed_N256.png",
+    charts = [
+        # 1) M fixed at 80: Prob_Win vs N
+        (fixed_m_path, "N", "Prob_Win",
+         f"Probability of Winning vs N (M fixed at 80){iter_suffix}",
+         "Initial Balance N ($)", "Probability of Winning", "prob_win_vs_N_fixed_M80.png"),
+        # 2) N fixed at 256: Prob_Win vs M
+        (fixed_n_path, "M_profit", "Prob_Win",
+         f"Probability of Winning vs M (N fixed at 256){iter_suffix}",
+         "Target Profit M ($)", "Probability of Winning", "prob_win_vs_M_fixed_N256.png"),
+        # 3) M fixed at 80: Expected Return vs N
+        (fixed_m_path, "N", "Expected_Return",
+         f"Expected Return vs N (M fixed at 80){iter_suffix}",
+         "Initial Balance N ($)", "Expected Return ($)", "expected_return_vs_N_fixed_M80.png"),
+        # 4) N fixed at 256: Expected Return vs M
+        (fixed_n_path, "M_profit", "Expected_Return",
+         f"Expected Return vs M (N fixed at 256){iter_suffix}",
+         "Target Profit M ($)", "Expected Return ($)", "expected_return_vs_M_fixed_N256.png"),
+    ]
+    # Each PNG is redrawn only when its sweep file (or its title/labels) changed
+    rendered, skipped = chart_cache.build(
+        [
+            (_render_line, out_dir / name, [path], [title, x_label, y_label],
+             (path, x_key, y_key, title, x_label, y_label, out_dir / name))
+            for path, x_key, y_key, title, x_label, y_label, name in charts
+        ],
+        workers=args.workers,
+        force=args.force,
     )
 
-    print(f"Saved charts to {out_dir}")
+    print(f"Saved charts to {out_dir} ({len(rendered)} redrawn, {len(skipped)} up to date)")
 
 
 if __name__ == "__main__":
@@ -1,37 +1,41 @@
-import csv
+import argparse
+import sys
 from pathlib import Path
 
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for strats.chart_cache
+from strats import chart_cache
+
+SWEEP_COLUMNS = ("N", "M", "M_profit", "Iterations", "Prob_Win", "Expected_Return")
+
 
 def _load_rows(path):
-    with open(path, newline="") as f:
-        return list(csv.DictReader(f))
+    # Numeric columns, parsed once and then loaded from .chart_cache/*.npz
+    return chart_cache.load_columns(path, SWEEP_COLUMNS)
 
 
 def _to_points(rows, x_key, y_key):
-    points = []
-    for row in rows:
-        if x_key not in row and x_key == "M_profit" and "M" in row:
-            x = float(row["M"])
-        else:
-            x = float(row[x_key])
-        y = float(row[y_key])
-        points.append((x, y))
+    if x_key not in rows and x_key == "M_profit" and "M" in rows:
+        x_key = "M"
+    points = [(float(x), float(y)) for x, y in zip(rows[x_key], rows[y_key])]
     points.sort(key=lambda p: p[0])
     return points
 
 
+def _marker(points):
+    # Adaptive sweeps (sweeper.py --sweep-mode adaptive) sample unevenly; mark where the points are
+    gaps = [b[0] - a[0] for a, b in zip(points, points[1:])]
+    if gaps and max(gaps) > 2 * min(gaps):
+        return {"marker": "o", "markersize": 3}
+    return {}
+
+
 def _infer_iterations(rows):
-    if not rows:
-        return None
-    sample = rows[0].get("Iterations")
-    if sample is None:
-        return None
-    try:
-        return int(float(sample))
-    except ValueError:
+    sample = rows.get("Iterations")
+    if sample is None or not len(sample):
         return None
+    return int(sample[0])
 
 
 def _plot_combo(
@@ -50,8 +54,8 @@ def _plot_combo(
     yb = [p[1] for p in points_b]
 
     plt.figure(figsize=(10, 6))
-    plt.plot(xa, ya, linewidth=2.0, label=label_a)
-    plt.plot(xb, yb, linewidth=2.0, label=label_b)
+    plt.plot(xa, ya, linewidth=2.0, label=label_a, **_marker(points_a))
+    plt.plot(xb, yb, linewidth=2.0, label=label_b, **_marker(points_b))
     plt.title(title)
     plt.xlabel(x_label)
     plt.ylabel(y_label)
@@ -62,23 +66,44 @@ def _plot_combo(
     plt.close()
 
 
+def _render_combo(fixed_m_path, fixed_n_path, y_key, title, y_label, out_path):
+    _plot_combo(
+        _to_points(_load_rows(fixed_m_path), "N", y_key),
+        "M fixed at 80 (x = N)",
+        _to_points(_load_rows(fixed_n_path), "M_profit", y_key),
+        "N fixed at 256 (x = M)",
+        title,
+        "N or M ($)",
+        y_label,
+        out_path,
+    )
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Chart a fixed-M and a fixed-N sweep on shared axes.")
+    parser.add_argument("paths", nargs="*")  # fixed_M and fixed_N tables (.csv or .npz), e.g. fixed_M_80_1000_adaptive.csv fixed_N_256_1000_adaptive.csv
+    parser.add_argument("--force", action="store_true")  # Redraw even if the sweep files didn't change
+    parser.add_argument("--workers", type=int, default=None)  # Processes for rendering (default: one per chart)
+    args = parser.parse_args()
+
     base_dir = Path(__file__).resolve().parent
     fixed_m_path = base_dir / "fixed_M_80_profit.csv"
     fixed_n_path = base_dir / "fixed_N_256_profit.csv"
+    if len(args.paths) > 1:
+        fixed_m_path, fixed_n_path = Path(args.paths[0]), Path(args.paths[1])
     out_dir = base_dir / "charts"
     out_dir.mkdir(exist_ok=True)
 
     if not fixed_m_path.exists():
-        candidates = sorted(base_dir.glob("fixed_M_*_*.csv"))
+        candidates = sorted([*base_dir.glob("fixed_M_*_*.csv"), *base_dir.glob("fixed_M_*_*.npz")])
         if not candidates:
-            raise FileNotFoundError(f"No fixed_M_*_*.csv files found in {base_dir}")
+            raise FileNotFoundError(f"No fixed_M_*_*.csv or .npz files found in {base_dir}")
         fixed_m_path = candidates[-1]
 
     if not fixed_n_path.exists():
-        candidates = sorted(base_dir.glob("fixed_N_*_*.csv"))
+        candidates = sorted([*base_dir.glob("fixed_N_*_*.csv"), *base_dir.glob("fixed_N_*_*.npz")])
         if not candidates:
-            raise FileNotFoundError(f"No fixed_N_*_*.csv files found in {base_dir}")
+            raise FileNotFoundError(f"No fixed_N_*_*.csv or .npz files found in {base_dir}")
         fixed_n_path = candidates[-1]
 
     rows_fixed_m = _load_rows(fixed_m_path)
@@ -87,35 +112,26 @@ def main():
     iterations = _infer_iterations(rows_fixed_m) or _infer_iterations(rows_fixed_n)
     iter_suffix = f" (Iterations: {iterations})" if iterations is not None else ""
 
-    # Combined Prob_Win chart
-    pts_prob_fixed_m = _to_points(rows_fixed_m, "N", "Prob_Win")
-    pts_prob_fixed_n = _to_points(rows_fixed_n, "M_profit", "Prob_Win")
-    _plot_combo(
-        pts_prob_fixed_m,
-        "M fixed at 80 (x = N)",
-        pts_prob_fixed_n,
-        "N fixed at 256 (x = M)",
-        f"Probability of Winning (Fixed M vs Fixed N){iter_suffix}",
-        "N or M ($)",
-        "Probability of Winning",
-        out_dir / "prob_win_combo_fixedM_fixedN.png",
-    )
-
-    # Combined Expected Return chart
-    pts_ret_fixed_m = _to_points(rows_fixed_m, "N", "Expected_Return")
-    pts_ret_fixed_n = _to_points(rows_fixed_n, "M_profit", "Expected_Return")
-    _plot_combo(
-        pts_ret_fixed_m,
-        "M fixed at 80 (x = N)",
-        pts_ret_fixed_n,
-        "N fixed at 256 (x = M)",
-        f"Expected Return (Fixed M vs Fixed N){iter_suffix}",
-        "N or M ($)",
-        "Expected Return ($)",
-        out_dir / "expected_return_combo_fixedM_fixedN.png",
+    charts = [
+        # Combined Prob_Win chart
+        ("Prob_Win", f"Probability of Winning (Fixed M vs Fixed N){iter_suffix}",
+         "Probability of Winning", "prob_win_combo_fixedM_fixedN.png"),
+        # Combined Expected Return chart
+        ("Expected_Return", f"Expected Return (Fixed M vs Fixed N){iter_suffix}",
+         "Expected Return ($)", "expected_return_combo_fixedM_fixedN.png"),
+    ]
+    # Each PNG is redrawn only when one of the sweep files (or its title/labels) changed
+    rendered, skipped = chart_cache.build(
+        [
+            (_render_combo, out_dir / name, [fixed_m_path, fixed_n_path], [title, y_label],
+             (fixed_m_path, fixed_n_path, y_key, title, y_label, out_dir / name))
+            for y_key, title, y_label, name in charts
+        ],
+        workers=args.workers,
+        force=args.force,
     )
 
-    print(f"Saved combo charts to {out_dir}")
+    print(f"Saved combo charts to {out_dir} ({len(rendered)} redrawn, {len(skipped)} up to date)")
 
 
 if __name__ == "__main__":
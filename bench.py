@@ -0,0 +1,257 @@
+# bench.py
+"""
+    Benchmarks for the simulation hot paths.
+
+        input: which cases to run (all by default) and an optional baseline JSON
+        output: seconds, spins/sec, runs/sec and peak memory per case, saved as JSON
+
+    Each case is timed best-of --repeat without tracing, then run once more
+    under tracemalloc for its peak Python allocation (tracing slows the code
+    down too much to time it at the same time). --compare flags cases whose
+    throughput dropped, or whose peak memory grew, by more than --threshold
+    against the baseline and exits non-zero so it can gate an engine change.
+
+    Rates are absolute, so a baseline only means something on the host that
+    measured it: none is committed. Save one with --save-baseline before the
+    change, then --compare after it on the same machine; a baseline from
+    another host is refused.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from game_engine import build_bet as bb
+from game_engine import roulette
+from strats import io as strat_io
+from strats.martingale import run_martingale
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SEQUENCE_DIR = os.path.join(BASE_DIR, 'sequences')
+DEFAULT_BASELINE = os.path.join(BASE_DIR, 'benchmarks', 'baseline.json')
+DEFAULT_THRESHOLD = 0.3
+RATE_METRICS = ('spins_per_sec', 'runs_per_sec')
+
+
+''' CASES: each returns the work done as {'spins': ..., 'runs': ...} '''
+def bench_spin(scale):
+    rng = random.Random(1)
+    spins = 200_000 * scale
+    for _ in range(spins):
+        roulette.spin(rng)
+    return {'spins': spins}
+
+
+def bench_payout(scale):
+    bet_array, _ = bb.build_bet_from_spec('red', 1.0)
+    spins = 100_000 * scale
+    for i in range(spins):
+        roulette.payout(bet_array, i % 38)
+    return {'spins': spins}
+
+
+def bench_build_bet(scale):
+    specs = ('red', 'black+1st12', 'number:17+col_b', 'custom:' + ','.join(['1'] * 38))
+    runs = 5_000 * scale
+    for i in range(runs):
+        bb.build_bet_from_spec(specs[i % len(specs)], 10.0)
+    return {'runs': runs}
+
+
+def bench_martingale_live(scale):
+    rng = random.Random(1)
+    runs = 2_000 * scale
+    spins = 0
+    for _ in range(runs):
+        spins += run_martingale(100, 80, bet_spec='red', rng=rng, keep_rows=False)['round_count']
+    return {'spins': spins, 'runs': runs}
+
+
+def bench_martingale_replay(scale):
+    outcomes = strat_io.load_sequence(os.path.join(SEQUENCE_DIR, 'roulette_sequence_100000.csv'))
+    runs = 20 * scale
+    spins = 0
+    for _ in range(runs):
+        # A buyout that is never reached replays the whole sequence (or until bust)
+        spins += run_martingale(1_000_000, 10**12, bet_spec='red', outcomes=outcomes, keep_rows=False)['round_count']
+    return {'spins': spins, 'runs': runs}
+
+
+def bench_load_sequence(scale):
+    paths = sorted(
+        os.path.join(SEQUENCE_DIR, name)
+        for name in os.listdir(SEQUENCE_DIR)
+        if name.endswith('.csv') or name.endswith(strat_io.BINARY_SUFFIX)
+    )
+    spins = 0
+    for _ in range(scale):
+        for path in paths:
+            spins += len(strat_io.load_sequence(path))
+    return {'spins': spins, 'runs': len(paths) * scale}
+
+
+def bench_sweep(scale):
+    from sweeper import SweepOptions, run_assignment
+    # Big enough to run for about a second, so the timing isn't all startup
+    iterations = 200 * scale
+    n_values = list(range(10, 210, 10))
+    m_values = list(range(10, 210, 10))
+    # run_assignment writes into its out_dir; keep it out of the repo
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        run_assignment(SweepOptions(
+            iterations=iterations,
+            seed_base=1,
+            n_values=n_values,
+            m_values=m_values,
+            progress_every=10**9,
+            out_dir=tmp,
+        ))
+    return {'runs': iterations * (len(n_values) + len(m_values))}
+
+
+CASES = {
+    'roulette.spin': bench_spin,
+    'roulette.payout': bench_payout,
+    'build_bet_from_spec': bench_build_bet,
+    'run_martingale.live': bench_martingale_live,
+    'run_martingale.replay': bench_martingale_replay,
+    'io.load_sequence': bench_load_sequence,
+    'run_assignment.sweep': bench_sweep,
+}
+
+
+def run_case(fn, scale=1, repeat=3):
+    best = None
+    work = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        work = fn(scale)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        fn(scale)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    result = {'seconds': round(best, 6), 'peak_kib': round(peak / 1024, 1)}
+    if 'spins' in work:
+        result['spins_per_sec'] = round(work['spins'] / best, 1)
+    if 'runs' in work:
+        result['runs_per_sec'] = round(work['runs'] / best, 1)
+    return result
+
+
+def run_benchmarks(names=None, scale=1, repeat=3):
+    results = {}
+    for name in names or CASES:
+        if name not in CASES:
+            raise ValueError(f"Unknown benchmark: {name}")
+        results[name] = run_case(CASES[name], scale, repeat)
+        print(_format_result(name, results[name]))
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'host': platform.node(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scale': scale,
+        'repeat': repeat,
+        'cases': results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    # Returns [(case, metric, baseline, current, change)] for every regression beyond threshold
+    if current.get('scale') != baseline.get('scale'):
+        print(f"Note: baseline scale {baseline.get('scale')} differs from {current.get('scale')}; "
+              "rates are still comparable, memory is not.")
+    regressions = []
+    for name, result in current['cases'].items():
+        base = baseline.get('cases', {}).get(name)
+        if base is None:
+            continue
+        for metric in RATE_METRICS:
+            if metric in result and base.get(metric):
+                change = result[metric] / base[metric] - 1.0
+                if change < -threshold:
+                    regressions.append((name, metric, base[metric], result[metric], change))
+        if base.get('peak_kib') and current.get('scale') == baseline.get('scale'):
+            change = result['peak_kib'] / base['peak_kib'] - 1.0
+            if change > threshold:
+                regressions.append((name, 'peak_kib', base['peak_kib'], result['peak_kib'], change))
+    return regressions
+
+
+def _format_result(name, result):
+    parts = [f"{name:<24} {result['seconds']:>9.3f}s"]
+    for metric in RATE_METRICS:
+        if metric in result:
+            parts.append(f"{metric}={result[metric]:,.0f}")
+    parts.append(f"peak={result['peak_kib']:,.1f}KiB")
+    return '  '.join(parts)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the simulation hot paths.")  # CLI config
+    parser.add_argument('cases', nargs='*', default=None)  # Case names to run (default: all)
+    parser.add_argument('--list', action='store_true')  # Print the case names and exit
+    parser.add_argument('--scale', type=int, default=1)  # Multiplies every case's workload
+    parser.add_argument('--repeat', type=int, default=3)  # Timed runs per case; the fastest is kept
+    parser.add_argument('--out', type=str, default=None)  # JSON results path (default: benchmarks/bench_<time>.json)
+    parser.add_argument('--compare', type=str, nargs='?', const=DEFAULT_BASELINE, default=None)  # Flag regressions against this baseline JSON
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)  # Allowed slowdown / memory growth (0.3 = 30%)
+    parser.add_argument('--save-baseline', action='store_true')  # Also write the results to benchmarks/baseline.json
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.list:
+        print('\n'.join(CASES))
+        return 0
+    try:
+        current = run_benchmarks(args.cases, max(1, args.scale), max(1, args.repeat))
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+
+    out_path = args.out or os.path.join(BASE_DIR, 'benchmarks', f"bench_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    paths = [out_path] + ([DEFAULT_BASELINE] if args.save_baseline else [])
+    for path in paths:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"Saved: {path}")
+
+    if args.compare:
+        if not os.path.exists(args.compare):
+            print(f"Error: baseline not found: {args.compare}; save one on this machine with --save-baseline first.")
+            return 2
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('host') != current['host'] or baseline.get('platform') != current['platform']:
+            print(f"Error: {args.compare} was measured on {baseline.get('host') or 'an unknown host'} "
+                  f"({baseline.get('platform')}); rates only compare on the same machine. "
+                  "Rerun with --save-baseline here first.")
+            return 2
+        regressions = compare(current, baseline, args.threshold)
+        for name, metric, base, value, change in regressions:
+            print(f"REGRESSION {name} {metric}: {base:,.1f} -> {value:,.1f} ({change:+.1%})")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
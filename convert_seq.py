@@ -0,0 +1,26 @@
+# convert_seq.py
+"""
+    Converts roulette sequences between CSV and the binary .rseq format.
+
+        input: sequence path (.csv or .rseq), optional output path
+        output: the same spins in the other format (default: same name, swapped extension)
+"""
+
+import sys
+
+from strats import io as strat_io
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python convert_seq.py <sequence.csv|sequence.rseq> [output_path]")
+        sys.exit(1)
+
+    src = sys.argv[1]
+    dst = sys.argv[2] if len(sys.argv) > 2 else None
+    try:
+        path = strat_io.convert_sequence(src, dst)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Converted '{src}' to '{path}'.")
@@ -0,0 +1,25 @@
+# export_csv.py
+"""
+    Exports columnar (.npz) run logs and sweep tables to CSV.
+
+        input: one or more .npz paths (martingale --format npz, sweeper.py --format npz)
+        output: the CSV the script would have written (default: same name, .csv)
+"""
+
+import sys
+
+from strats import io as strat_io
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python export_csv.py <results.npz> [<results.npz> ...]")
+        sys.exit(1)
+
+    for src in sys.argv[1:]:
+        try:
+            path = strat_io.export_csv(src)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"Exported '{src}' to '{path}'.")
@@ -7,6 +7,9 @@
 
 """
 
+from collections import namedtuple
+from functools import lru_cache
+
 from game_engine.colors import RED_SET, BLACK_SET
 
 # NUMBER + 1 = ARRAY INDEX
@@ -189,3 +192,22 @@ def build_bet_from_spec(bet_spec, amount):
         labels.append(label)
 
     return combine_bets(*bets), ' + '.join(labels)
+
+
+''' COMPILED BET '''
+# weights: unit (1.0 total) 38-slot bet, net_table: net result per 1.0 wagered for each winning index
+CompiledBet = namedtuple('CompiledBet', ['spec', 'label', 'weights', 'net_table'])
+
+
+def compile_bet(bet_spec):
+    if isinstance(bet_spec, CompiledBet):
+        return bet_spec
+    return _compile_bet(bet_spec or 'red')
+
+
+@lru_cache(maxsize=None)
+def _compile_bet(bet_spec):
+    weights, label = build_bet_from_spec(bet_spec, 1.0)
+    # A winning slot returns its stake x36; everything else on the table (1.0 total) is lost
+    net_table = tuple(w * 36 - 1.0 if w > 0 else -1.0 for w in weights)
+    return CompiledBet(bet_spec, label, tuple(weights), net_table)
@@ -0,0 +1,101 @@
+# rng.py
+"""
+    Splittable, Counter-Based Random Streams for American Roulette.
+
+        input: a seed, a point (any tuple, e.g. (N, buyout)) and an iteration index
+        output: a stream of winning indices (0-37) that depends on nothing else
+
+    Streams are Philox4x64 generators: the key is a hash of (seed, point) and
+    the iteration sits in the top word of the 256-bit counter, so every
+    (seed, point, iteration) owns a disjoint block of the counter space. A
+    worker, process or node can start any stream directly; results are the
+    same however iterations are split up or ordered.
+
+    Spins are drawn from NumPy in blocks (starting small, doubling) and served
+    one at a time to the round-by-round engine, or in bulk via spins(count).
+"""
+
+import hashlib
+import os
+from functools import lru_cache
+
+import numpy as np
+
+WHEEL_SLOTS = 38
+FIRST_BLOCK = 32
+MAX_BLOCK = 4096
+
+
+@lru_cache(maxsize=65536)
+def _point_key(seed, point):
+    digest = hashlib.sha256(repr((seed, point)).encode()).digest()
+    return np.frombuffer(digest[:16], dtype=np.uint64).copy()
+
+
+def stream_key(seed=None, point=()):
+    # 128-bit Philox key for (seed, point); seed None draws a fresh key
+    if seed is None:
+        return np.frombuffer(os.urandom(16), dtype=np.uint64).copy()
+    return _point_key(seed, tuple(point))
+
+
+def generator(seed=None, point=(), index=0):
+    # NumPy Generator on the (seed, point, index) counter block, for engines that draw whole arrays
+    counter = np.array([0, 0, 0, index], dtype=np.uint64)
+    return np.random.Generator(np.random.Philox(key=stream_key(seed, point), counter=counter))
+
+
+class Stream:
+    """One (seed, point, iteration) stream; a drop-in for random.Random in roulette.spin."""
+
+    __slots__ = ('_gen', '_buffer', '_pos', '_block')
+
+    def __init__(self, seed=None, point=(), index=0):
+        self._gen = generator(seed, point, index)
+        self._buffer = ()
+        self._pos = 0
+        self._block = FIRST_BLOCK
+
+    def _next_block(self):
+        # The stream is defined block by block (32, 64, ... then 4096 spins), so the
+        # values don't depend on how callers mix single and bulk draws
+        block = self._gen.integers(0, WHEEL_SLOTS, size=self._block, dtype=np.uint8)
+        self._block = min(self._block * 2, MAX_BLOCK)
+        return block
+
+    def spins(self, count):
+        # Bulk draw of `count` winning indices (uint8), continuing the stream
+        parts = []
+        if self._pos < len(self._buffer):
+            take = self._buffer[self._pos:self._pos + count]
+            self._pos += len(take)
+            count -= len(take)
+            parts.append(np.array(take, dtype=np.uint8))
+        while count > 0:
+            block = self._next_block()
+            if len(block) > count:
+                # Keep the rest of a partly used block for later draws
+                self._buffer = block.tolist()
+                self._pos = count
+                block = block[:count]
+            count -= len(block)
+            parts.append(block)
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint8)
+
+    def randint(self, a, b):
+        if a != 0 or b != WHEEL_SLOTS - 1:
+            # Other ranges draw from the generator directly and shift the spin blocks that follow
+            return int(self._gen.integers(a, b + 1))
+        if self._pos == len(self._buffer):
+            self._buffer = self._next_block().tolist()
+            self._pos = 0
+        value = self._buffer[self._pos]
+        self._pos += 1
+        return value
+
+    def random(self):
+        return float(self._gen.random())
+
+
+def stream(seed=None, point=(), index=0):
+    return Stream(seed, point, index)
@@ -8,6 +8,7 @@
 """
 import random
 
+from game_engine import rng
 from game_engine.colors import num_to_color
 
 ''' INDEX/NUMBER MAPPING '''
@@ -28,7 +29,11 @@ def num_to_index(num):
 '''
 
 ''' RNG HELPER '''
-def get_rng(seed=None):
+# stream: (point, iteration) -> a splittable counter-based stream keyed by (seed, point, iteration)
+def get_rng(seed=None, stream=None):
+    if stream is not None:
+        point, index = stream
+        return rng.stream(seed, point, index)
     if seed is None:
         return random
     return random.Random(seed)
@@ -2,18 +2,44 @@
 """
     Generates a sequence of roulette spins and saves them to a CSV file.
 
-        input: number of spins (int)
+        input: number of spins (int), optional --binary, --seed, --chunk-size
         output: CSV file with columns [Round, Winning Number, Winning Index, Color]
+                or (--binary) a memory-mappable .rseq file of winning indices
+
+    Runs over 100,000 spins (or any seeded run) use the bulk generator, which
+    draws spins in NumPy blocks and writes them chunk by chunk, so memory stays
+    bounded by --chunk-size however many spins are requested.
 """
 
+import argparse
 import sys
 import csv
 import os
+import time
+
+import numpy as np
 
 from game_engine import roulette
+from strats import io as strat_io
+
+BULK_THRESHOLD = 100_000
+DEFAULT_CHUNK_SIZE = 1 << 20
 
+# CSV tail for each winning index: "Winning Number,Winning Index,Color"
+_CSV_TAILS = np.array([
+    f",{roulette.index_to_num(i)},{i},{roulette.num_to_color(roulette.index_to_num(i))}"
+    for i in range(38)
+], dtype=object)
+
+
+def generate_sequence(spins, binary=False):
+    if binary:
+        filepath = os.path.join('./sequences', f"roulette_sequence_{spins}{strat_io.BINARY_SUFFIX}")
+        os.makedirs('./sequences', exist_ok=True)
+        strat_io.write_sequence_binary([roulette.spin() for _ in range(spins)], filepath)
+        print(f"Successfully generated {spins} rolls in '{filepath}'.")
+        return
 
-def generate_sequence(spins):
     filename = f"roulette_sequence_{spins}.csv"
     filepath = os.path.join('./sequences', filename)
 
@@ -32,28 +58,73 @@ def generate_sequence(spins):
     print(f"Successfully generated {spins} rolls in '{filepath}'.")
 
 
+def generate_sequence_bulk(spins, binary=False, seed=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=True):
+    suffix = strat_io.BINARY_SUFFIX if binary else '.csv'
+    filepath = os.path.join('./sequences', f"roulette_sequence_{spins}{suffix}")
+    gen = np.random.default_rng(seed)
+    start_time = time.time()
+
+    os.makedirs('./sequences', exist_ok=True)
+    with open(filepath, mode='wb') as file:
+        if binary:
+            file.write(strat_io.sequence_header(spins))
+        else:
+            file.write((','.join(strat_io.SEQUENCE_FIELDS) + '\r\n').encode())
+
+        done = 0
+        while done < spins:
+            count = min(chunk_size, spins - done)
+            indices = gen.integers(0, 38, size=count, dtype=np.uint8)
+            if binary:
+                file.write(indices.tobytes())
+            else:
+                rounds = np.arange(done + 1, done + count + 1).astype(str).astype(object)
+                file.write(('\r\n'.join(rounds + _CSV_TAILS[indices]) + '\r\n').encode())
+            done += count
+
+            if progress:
+                elapsed = time.time() - start_time
+                rate = done / elapsed if elapsed else 0.0
+                eta = (spins - done) / rate if rate else 0.0
+                msg = f"[{done}/{spins}] {rate / 1e6:.2f}M spins/s elapsed={elapsed:.1f}s eta={eta:.1f}s"
+                print(msg, end="\r", flush=True)
+
+    if progress:
+        print()
+    print(f"Successfully generated {spins} rolls in '{filepath}'.")
+    return filepath
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a roulette spin sequence.")
+    parser.add_argument('spins', type=int, nargs='?', default=None)  # Number of spins (prompted if omitted)
+    parser.add_argument('--binary', action='store_true')  # Write .rseq instead of CSV
+    parser.add_argument('--seed', type=int, default=None)  # Seed for a reproducible (bulk) sequence; same seed + chunk size, same spins
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)  # Spins drawn/written per block
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
     # 1. Handle CLI Arguments or User Prompts
-    if len(sys.argv) > 1:
-        try:
-            num_spins = int(sys.argv[1])
-        except ValueError:
-            print("Error: Please enter a valid integer for the number of spins.")
-            sys.exit(1)
-    else:
+    args = parse_args()
+    num_spins = args.spins
+    if num_spins is None:
         try:
-            num_spins = int(input("Enter quantity of rolls (max 100,000): "))
+            num_spins = int(input("Enter quantity of rolls: "))
         except ValueError:
             print("Error: Input must be an integer.")
             sys.exit(1)
 
     # 2. Validation
-    if num_spins > 100000:
-        print("Limit exceeded. Setting spins to 100,000.")
-        num_spins = 100000
-    elif num_spins <= 0:
+    if num_spins <= 0:
         print("Please enter a positive number.")
         sys.exit(1)
+    if args.chunk_size <= 0:
+        print("Chunk size must be a positive number.")
+        sys.exit(1)
 
     # 3. Generate
-    generate_sequence(num_spins)
+    if num_spins > BULK_THRESHOLD or args.seed is not None:
+        generate_sequence_bulk(num_spins, binary=args.binary, seed=args.seed, chunk_size=args.chunk_size)
+    else:
+        generate_sequence(num_spins, binary=args.binary)
@@ -0,0 +1,435 @@
+# serve.py
+"""
+    Local Job Server for sweeps and Martingale runs.
+
+        input: POST /sweep or /martingale with a JSON body (over TCP or a Unix socket)
+        output: a streamed NDJSON response: accepted, one line per finished point (and per
+                line the sweep prints), done
+
+    One process pool is started with the server and shared by every job, so
+    workers stay warm: each keeps the sequences it has loaded (per path,
+    reloaded if the file changes) and its compiled bets between jobs. Jobs
+    take the same parameters as the CLIs, either as {"argv": [...]} or as a
+    JSON object of options:
+
+        /sweep       sweeper.py flags by name, e.g. {"iterations": 50, "n_values": "16 32 64", "no_cache": true}
+        /martingale  {"initial_balance": 100, "buyout": 80, "sequence_path": ..., "bet": "red", "tail": 5}
+
+    Sweeps run in threads (up to --max-jobs at once) and hand their grid
+    points to the shared pool. What a sweep prints (notes, progress,
+    warnings) goes to its own response as "log" lines rather than the
+    server's console. Each job writes to its own directory,
+    <out dir>/jobs/<server start>/<job id> (assignment_data for sweeps,
+    strats/strat_data for Martingale runs), so jobs with the same parameters
+    don't overwrite each other's tables or checkpoints; the result cache is
+    shared. The directory is in the accepted and done lines. To resume an
+    interrupted sweep, send the same parameters with "resume_dir" set to
+    that directory (from this server or an earlier one); the job reruns
+    there with --resume. GET /health and GET /jobs report the pool and the
+    jobs seen so far.
+
+        curl -N localhost:8765/sweep -d '{"iterations": 20, "n_values": "16 32", "m_values": "10 20"}'
+"""
+
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+import io
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import sweeper
+from strats import io as strat_io
+from strats import martingale
+
+DEFAULT_PORT = 8765
+MAX_BODY = 1 << 20
+MARTINGALE_DIR = os.path.join(os.path.dirname(os.path.abspath(martingale.__file__)), 'strat_data')
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large'}
+
+
+''' WORKERS '''
+def _init_worker(preload):
+    # Fork-started workers share the parent's random state; reseed, then warm the sequence cache
+    random.seed()
+    for path in preload:
+        strat_io.load_sequence_cached(path)
+
+
+def _martingale_job(argv):
+    # strats.martingale.main in a pool worker; returns (result or None on error, printed output)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        result = martingale.main(argv)
+    return result, out.getvalue()
+
+
+''' REQUESTS -> CLI ARGUMENTS '''
+def _flags(options):
+    # {"n_values": "1 2", "no_cache": true} -> ['--n-values', '1 2', '--no-cache']
+    argv = []
+    for key, value in options.items():
+        flag = '--' + key.replace('_', '-')
+        if value is True:
+            argv.append(flag)
+        elif value is False or value is None:
+            continue
+        elif isinstance(value, list):
+            argv += [flag, ' '.join(str(v) for v in value)]
+        else:
+            argv += [flag, str(value)]
+    return argv
+
+
+def sweep_options(body):
+    # sweeper.SweepOptions for a /sweep body; argparse errors become ValueError
+    argv = body['argv'] if 'argv' in body else _flags(body)
+    err = io.StringIO()
+    try:
+        with contextlib.redirect_stderr(err):
+            args = sweeper.parse_args([str(a) for a in argv])
+    except SystemExit:
+        raise ValueError(err.getvalue().strip().splitlines()[-1] if err.getvalue().strip() else 'invalid sweep arguments')
+    if args.profile:
+        raise ValueError("--profile is not supported by the server; profile with sweeper.py directly.")
+    return sweeper.assignment_options(args)
+
+
+def resume_dir(path, base):
+    # An earlier sweep job's directory under base/jobs, to rerun with --resume
+    jobs = os.path.realpath(os.path.join(base, 'jobs'))
+    real = os.path.realpath(str(path))
+    if real == jobs or os.path.commonpath([jobs, real]) != jobs or not os.path.isdir(real):
+        raise ValueError(f"resume_dir must be an existing job directory under {os.path.join(base, 'jobs')}, got {path!r}.")
+    return str(path)
+
+
+def martingale_argv(body):
+    # strats.martingale.main argv for a /martingale body; prints only a summary unless tail is given
+    if 'argv' in body:
+        argv = [str(a) for a in body['argv']]
+    else:
+        options = dict(body)
+        if 'initial_balance' not in options or 'buyout' not in options:
+            raise ValueError("initial_balance and buyout are required.")
+        argv = [str(options.pop('initial_balance')), str(options.pop('buyout'))]
+        for key in ('sequence_path', 'bet'):
+            value = options.pop(key, None)
+            if value:
+                argv.append(str(value))
+        argv += _flags(options)
+    positional = [a for a in argv if not a.startswith('--')]
+    if len(positional) < 2:
+        # Fewer arguments would make main() prompt on stdin
+        raise ValueError("initial_balance and buyout are required.")
+    if '--tail' not in argv and '--quiet' not in argv:
+        argv.append('--quiet')
+    return ['martingale.py'] + argv
+
+
+''' SERVER '''
+class ThreadOutput(io.TextIOBase):
+    """Stands in for sys.stdout / sys.stderr: writes from a thread with a handler go to it, the rest to the stream."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def to(self, handler):
+        # This thread's writes go to handler(text) until the block exits
+        self._local.handler = handler
+        try:
+            yield
+        finally:
+            self._local.handler = None
+
+    def write(self, text):
+        handler = getattr(self._local, 'handler', None)
+        if handler is None:
+            return self.stream.write(text)
+        handler(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+class LineBuffer:
+    """Cuts written text into lines (progress lines end in a carriage return) and emits each non-blank one."""
+
+    def __init__(self, emit):
+        self.emit = emit
+        self._pending = ''
+
+    def write(self, text):
+        lines = (self._pending + text).replace('\r', '\n').split('\n')
+        self._pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                self.emit(line)
+
+    def close(self):
+        if self._pending.strip():
+            self.emit(self._pending)
+        self._pending = ''
+
+
+class JobServer:
+    """Warm process pool plus the job table; one instance per listening socket."""
+
+    def __init__(self, workers=None, max_jobs=4, preload=()):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(tuple(preload),))
+        self.threads = ThreadPoolExecutor(max_workers=max(1, max_jobs), thread_name_prefix='sweep')
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        # Job directories are per server process, so a restarted server doesn't reuse job 1's
+        self.run_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        # Sweep threads print through these, so each job's output reaches its own client
+        self.stdout, self.stderr = ThreadOutput(sys.stdout), ThreadOutput(sys.stderr)
+        sys.stdout, sys.stderr = self.stdout, self.stderr
+
+    def close(self):
+        self.threads.shutdown(wait=False, cancel_futures=True)
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        sys.stdout, sys.stderr = self.stdout.stream, self.stderr.stream
+
+    def _new_job(self, kind, params):
+        job = {'id': next(self._ids), 'kind': kind, 'status': 'queued', 'submitted': time.time(), 'done': 0, 'total': None}
+        job['params'] = params
+        self.jobs[job['id']] = job
+        return job
+
+    def _job_dir(self, job, base):
+        job['out_dir'] = os.path.join(base, 'jobs', self.run_id, str(job['id']))
+        return job['out_dir']
+
+    async def run_sweep(self, options, send, job_dir=None):
+        # job_dir: an earlier job's directory to resume in (see resume_dir) instead of a new one
+        loop = asyncio.get_running_loop()
+        job = self._new_job('sweep', {k: v for k, v in dataclasses.asdict(options).items() if v is not None})
+        if job_dir is None:
+            job_dir = self._job_dir(job, options.out_dir)
+        job['out_dir'] = job_dir
+        # The pool's size stands in for --workers (adaptive mode batches by it)
+        options = dataclasses.replace(options, out_dir=job_dir, workers=self.workers)
+        await send({'event': 'accepted', 'job': job['id'], 'out_dir': job['out_dir']})
+        queue = asyncio.Queue()
+
+        def _on_point(point):
+            job['done'], job['total'] = point['done'], point['total']
+            loop.call_soon_threadsafe(queue.put_nowait, dict(point, event='point'))
+
+        def _run():
+            job['status'] = 'running'
+            log = LineBuffer(lambda line: loop.call_soon_threadsafe(queue.put_nowait, {'line': line, 'event': 'log'}))
+            try:
+                with self.stdout.to(log.write), self.stderr.to(log.write):
+                    return sweeper.run_assignment(options, executor=self.pool, on_point=_on_point)
+            finally:
+                log.close()
+
+        future = loop.run_in_executor(self.threads, _run)
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(queue.put_nowait, None))
+        while True:
+            record = await queue.get()
+            if record is None:
+                break
+            await send(dict(record, job=job['id']))
+        await self._finish(job, future, send, lambda paths: {'outputs': list(paths), 'out_dir': job['out_dir']})
+
+    async def run_martingale(self, argv, send):
+        loop = asyncio.get_running_loop()
+        job = self._new_job('martingale', {'argv': argv[1:]})
+        # Appended last, so it takes the place of any --out-dir in the request
+        argv = argv + ['--out-dir', self._job_dir(job, MARTINGALE_DIR)]
+        await send({'event': 'accepted', 'job': job['id'], 'out_dir': job['out_dir']})
+        job['status'] = 'running'
+        future = loop.run_in_executor(self.pool, _martingale_job, argv)
+        await asyncio.wait([future])
+
+        def _summary(value):
+            result, output = value
+            if result is None:
+                # main() prints "Error: ..." and returns None
+                raise ValueError(output.strip().splitlines()[-1] if output.strip() else 'run failed')
+            return {
+                'outcome': result['outcome_label'],
+                'rounds': result['round_count'],
+                'final_balance': result['final_balance'],
+                'out_dir': job['out_dir'],
+                'output': output.splitlines(),
+            }
+
+        await self._finish(job, future, send, _summary)
+
+    async def _finish(self, job, future, send, summarize):
+        try:
+            fields = summarize(future.result())
+        except Exception as e:  # report any job failure to the client instead of dropping the stream
+            job['status'] = 'failed'
+            job['error'] = str(e)
+            await send({'event': 'error', 'job': job['id'], 'message': f"{type(e).__name__}: {e}"})
+            return
+        job['status'] = 'done'
+        job['seconds'] = round(time.time() - job['submitted'], 3)
+        await send(dict(fields, event='done', job=job['id'], seconds=job['seconds']))
+
+    async def handle(self, reader, writer):
+        try:
+            method, path, body = await _read_request(reader)
+        except ValueError as e:
+            await _respond(writer, 400, {'error': str(e)})
+            return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+
+        if method == 'GET' and path == '/health':
+            running = sum(job['status'] == 'running' for job in self.jobs.values())
+            await _respond(writer, 200, {'status': 'ok', 'workers': self.workers, 'running': running, 'jobs': len(self.jobs)})
+            return
+        if method == 'GET' and path == '/jobs':
+            await _respond(writer, 200, {'jobs': list(self.jobs.values())})
+            return
+        if path not in ('/sweep', '/martingale'):
+            await _respond(writer, 404, {'error': f"unknown path {path}"})
+            return
+        if method != 'POST':
+            await _respond(writer, 405, {'error': f"{path} takes POST"})
+            return
+
+        job_dir = None
+        try:
+            params = json.loads(body or b'{}')
+            if not isinstance(params, dict):
+                raise ValueError("request body must be a JSON object.")
+            if path == '/sweep':
+                resume_from = params.pop('resume_dir', None)
+                job_args = sweep_options(params)
+                if resume_from is not None:
+                    job_dir = resume_dir(resume_from, job_args.out_dir)
+                    job_args = dataclasses.replace(job_args, resume=True)
+            else:
+                job_args = martingale_argv(params)
+        except ValueError as e:
+            await _respond(writer, 400, {'error': str(e)})
+            return
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: application/x-ndjson\r\n"
+            b"Transfer-Encoding: chunked\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        connected = True
+
+        async def _send(record):
+            # A client that hangs up doesn't stop the job; its remaining lines are dropped
+            nonlocal connected
+            if not connected:
+                return
+            line = (json.dumps(record) + '\n').encode()
+            writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+            try:
+                await writer.drain()
+            except ConnectionError:
+                connected = False
+
+        try:
+            if path == '/sweep':
+                await self.run_sweep(job_args, _send, job_dir)
+            else:
+                await self.run_martingale(job_args, _send)
+            if connected:
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def _read_request(reader):
+    # (method, path, body) from a minimal HTTP/1.1 request
+    request_line = (await reader.readline()).decode('latin-1').split()
+    if len(request_line) != 3:
+        raise ValueError("malformed request line.")
+    method, path, _ = request_line
+    length = 0
+    while True:
+        line = (await reader.readline()).decode('latin-1').strip()
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value.strip())
+    if length > MAX_BODY:
+        raise ValueError("request body too large.")
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), path.split('?', 1)[0], body
+
+
+async def _respond(writer, status, payload):
+    body = (json.dumps(payload) + '\n').encode()
+    writer.write(
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n".encode() + body
+    )
+    try:
+        await writer.drain()
+    except ConnectionError:
+        pass
+    writer.close()
+
+
+async def serve(host='127.0.0.1', port=DEFAULT_PORT, socket_path=None, workers=None, max_jobs=4, preload=()):
+    server = JobServer(workers, max_jobs, preload)
+    if socket_path:
+        listener = await asyncio.start_unix_server(server.handle, path=socket_path)
+        where = socket_path
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+        where = f"http://{host}:{port}"
+    print(f"Serving sweep and martingale jobs on {where} with {server.workers} workers (Ctrl-C to stop)", flush=True)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve sweep and martingale jobs on a warm worker pool.")  # CLI config
+    parser.add_argument('--host', type=str, default='127.0.0.1')  # TCP address to listen on
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)  # TCP port to listen on
+    parser.add_argument('--socket', type=str, default=None)  # Listen on this Unix socket instead of TCP
+    parser.add_argument('--workers', type=int, default=None)  # Worker processes shared by all jobs (default: CPU count)
+    parser.add_argument('--max-jobs', type=int, default=4)  # Sweeps running at once; later ones wait
+    parser.add_argument('--preload', type=str, nargs='*', default=[])  # Sequence files every worker loads at startup
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.socket, args.workers, args.max_jobs, args.preload))
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+# adaptive.py
+"""
+    Sequential Stopping for sweeper grid points.
+
+        input: per-iteration outcomes (won, return) as they are simulated
+        output: running Prob_Win / Expected_Return with their confidence intervals
+
+    Running mean and variance use Welford's update (Chan's merge for whole
+    NumPy chunks from the batch engine), so nothing per-iteration is kept.
+    A point stops once both 95% CI half-widths are within target.
+
+    Prob_Win uses the Wilson score interval rather than p +/- z * SE: with no
+    wins (or no losses) yet the latter is exactly 0 and a rare-event point
+    would stop at the minimum sample size, while Wilson's half-width stays
+    near z^2 / 2n until the event has actually been seen.
+"""
+
+import math
+
+import numpy as np
+
+Z_95 = 1.959963984540054
+
+
+class RunningStats:
+    """Welford running mean / variance."""
+
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def add_many(self, values):
+        values = np.asarray(values, dtype=float)
+        if not values.size:
+            return
+        count = values.size
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def half_width(self, z=Z_95):
+        if self.count < 2:
+            return math.inf
+        return z * math.sqrt(self.m2 / (self.count - 1) / self.count)
+
+
+def wilson_half_width(p, count, z=Z_95):
+    # Half-width of the Wilson score interval for a proportion p observed over count samples
+    if count < 1:
+        return math.inf
+    z2 = z * z
+    return z / (1 + z2 / count) * math.sqrt(p * (1 - p) / count + z2 / (4 * count * count))
+
+
+class PointStats:
+    """Running Prob_Win and Expected_Return for one grid point."""
+
+    __slots__ = ('win', 'ret')
+
+    def __init__(self):
+        self.win = RunningStats()
+        self.ret = RunningStats()
+
+    def add(self, won, ret):
+        self.win.add(1.0 if won else 0.0)
+        self.ret.add(ret)
+
+    def add_many(self, won, ret):
+        self.win.add_many(won)
+        self.ret.add_many(ret)
+
+    @property
+    def count(self):
+        return self.win.count
+
+    def win_half_width(self):
+        return wilson_half_width(self.win.mean, self.count)
+
+    def converged(self, target_ci, target_ci_return=None):
+        if self.win_half_width() > target_ci:
+            return False
+        return target_ci_return is None or self.ret.half_width() <= target_ci_return
+
+    def summary(self):
+        # (wins, prob_win, expected_return, iterations, ci_prob, ci_return)
+        return (
+            int(round(self.win.mean * self.count)),
+            self.win.mean,
+            self.ret.mean,
+            self.count,
+            self.win_half_width(),
+            self.ret.half_width(),
+        )
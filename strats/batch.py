@@ -0,0 +1,98 @@
+# batch.py
+"""
+    Batch Martingale Engine for American Roulette.
+
+        input: initial balance, buyout, bet spec, number of sessions (K)
+        output: per-session final balances, outcomes and round counts
+
+    Runs K independent live-RNG sessions in lockstep with NumPy arrays for
+    balance, progression state and status. Sessions drop out as soon as they bust or hit
+    the buyout target, so each round only touches the sessions still playing.
+    Any progression in strats.strategies runs here through its array rules.
+"""
+
+import numpy as np
+
+from game_engine import build_bet as bb
+from strats import strategies
+
+# Session outcome codes (match run_martingale's outcome labels)
+ACTIVE = 0
+SUCCESS = 1
+BUST = 2
+OUTCOME_LABELS = {ACTIVE: 'ACTIVE', SUCCESS: 'SUCCESS', BUST: 'BUST'}
+
+
+def run_martingale_batch(initial_balance, buyout, sessions, bet_spec=None, seed=None):
+    return run_strategy_batch('martingale', initial_balance, buyout, sessions, bet_spec=bet_spec, seed=seed)
+
+
+def run_strategy_batch(strategy, initial_balance, buyout, sessions, bet_spec=None, seed=None):
+    strategy = strategies.get_strategy(strategy)
+    target_balance = initial_balance + buyout
+    net_table = np.array(bb.compile_bet(bet_spec).net_table)
+    gen = np.random.default_rng(seed)
+
+    final_balance = np.full(sessions, float(initial_balance))
+    round_count = np.zeros(sessions, dtype=np.int64)
+    outcome = np.full(sessions, ACTIVE, dtype=np.int8)
+
+    # Compacted state of the sessions still playing
+    live = np.arange(sessions)
+    balance = final_balance.copy()
+    state = strategy.start_batch(sessions)
+    rounds = 0
+
+    # Sessions that start outside (0, target) never place a bet
+    done = (balance <= 0) | (balance >= target_balance)
+    if done.any():
+        outcome[done] = np.where(balance[done] >= target_balance, SUCCESS, BUST)
+        keep = ~done
+        live, balance, state = live[keep], balance[keep], strategy.select_batch(state, keep)
+
+    while live.size:
+        rounds += 1
+
+        # 1. All-in when the wager can't be covered
+        stake = np.minimum(strategy.wager_batch(state), balance)
+
+        # 2. Spin every live session at once and settle
+        win_index = gen.integers(0, 38, size=live.size)
+        net = stake * net_table[win_index]
+        balance += net
+
+        # 3. Progression (Martingale: double on loss, reset on win)
+        state = strategy.update_batch(state, stake, net > 0)
+
+        # 4. Retire sessions that busted or hit the target
+        hit = balance >= target_balance
+        bust = balance <= 0
+        done = hit | bust
+        if done.any():
+            finished = live[done]
+            final_balance[finished] = balance[done]
+            round_count[finished] = rounds
+            outcome[finished] = np.where(hit[done], SUCCESS, BUST)
+            keep = ~done
+            live, balance, state = live[keep], balance[keep], strategy.select_batch(state, keep)
+
+    return {
+        'final_balance': final_balance,
+        'round_count': round_count,
+        'outcome': outcome,
+        'target_balance': target_balance,
+    }
+
+
+def simulate_point_batch(n, m, iterations, bet_spec='red', seed=None, strategy='martingale', stats=None):
+    # stats: optional strats.adaptive.PointStats fed with every session's result
+    if not iterations:
+        return 0, 0.0, 0.0
+    result = run_strategy_batch(strategy, n, m, iterations, bet_spec=bet_spec, seed=seed)
+    won = result['outcome'] == SUCCESS
+    returns = result['final_balance'] - n
+    if stats is not None:
+        stats.add_many(won, returns)
+    wins = int(np.count_nonzero(won))
+    total_return = float(np.sum(returns))
+    return wins, wins / iterations, total_return / iterations
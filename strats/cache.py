@@ -0,0 +1,112 @@
+# cache.py
+"""
+    Content-Addressed Result Cache for sweeper grid points (SQLite).
+
+        input: everything that determines a point's result (N, buyout, bet,
+               strategy, engine, seed base, sequence hash, replay setup)
+        output: the stored (iterations, wins, prob_win, expected_return)
+
+    Iterations are not part of the key for engines whose iteration i only
+    depends on (seed base, i): a 50-iteration request on a 5-iteration entry
+    simulates iterations 5..49 and merges them. The batch engine seeds one
+    generator at the sample's first iteration, so its entries are keyed by
+    iteration count and never extended. Entries are evicted least
+    recently used once the table grows past max_entries. Only reproducible
+    points are cached: unseeded random runs are fresh draws every time and
+    the sweeper doesn't look them up.
+
+    The connection autocommits, so every stored point is on disk as soon as
+    it is stored (a killed run keeps what it computed), and the database is in
+    WAL mode with a busy timeout, so several sweeps can share one cache.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from game_engine import build_bet as bb
+
+# Bump when an engine's results change for the same inputs
+ENGINE_VERSION = 3
+DEFAULT_NAME = 'sweep_cache.sqlite'  # the sweeper keeps it in its output directory
+DEFAULT_PATH = os.path.join('assignment_data', DEFAULT_NAME)
+DEFAULT_MAX_ENTRIES = 100_000
+BUSY_TIMEOUT = 60.0  # seconds to wait for another sweep's write to finish
+
+
+def file_digest(path):
+    if not path or not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def point_key(**params):
+    # The bet is keyed by its payout table so equivalent specs ('Red', 'red') share entries
+    params['bet_spec'] = list(bb.compile_bet(params.get('bet_spec')).net_table)
+    params['engine_version'] = ENGINE_VERSION
+    blob = json.dumps(params, sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest(), blob
+
+
+def open_cache(path=DEFAULT_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    # isolation_level=None: no implicit transaction is left open between statements
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS points ("
+        " key TEXT PRIMARY KEY,"
+        " params TEXT NOT NULL,"
+        " iterations INTEGER NOT NULL,"
+        " wins INTEGER NOT NULL,"
+        " prob_win REAL NOT NULL,"
+        " expected_return REAL NOT NULL,"
+        " last_used REAL NOT NULL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS points_last_used ON points (last_used)")
+    return conn
+
+
+def lookup(conn, key):
+    row = conn.execute(
+        "SELECT iterations, wins, prob_win, expected_return FROM points WHERE key = ?",
+        (key,),
+    ).fetchone()
+    if row is not None:
+        conn.execute("UPDATE points SET last_used = ? WHERE key = ?", (time.time(), key))
+    return row
+
+
+def store(conn, key, params, iterations, wins, prob_win, expected_return):
+    # Never replace a larger sample with a smaller one
+    conn.execute(
+        "INSERT INTO points VALUES (?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET iterations = excluded.iterations, wins = excluded.wins,"
+        " prob_win = excluded.prob_win, expected_return = excluded.expected_return,"
+        " last_used = excluded.last_used WHERE excluded.iterations >= points.iterations",
+        (key, params, iterations, wins, prob_win, expected_return, time.time()),
+    )
+
+
+def evict(conn, max_entries=DEFAULT_MAX_ENTRIES):
+    # Drop least recently used entries beyond max_entries
+    conn.execute(
+        "DELETE FROM points WHERE key IN ("
+        " SELECT key FROM points ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+        (max(0, max_entries),),
+    )
+
+
+def merge(cached, extra):
+    # Combine (iterations, wins, prob_win, expected_return) samples
+    iterations = cached[0] + extra[0]
+    wins = cached[1] + extra[1]
+    expected_return = (cached[3] * cached[0] + extra[3] * extra[0]) / iterations
+    return iterations, wins, wins / iterations, expected_return
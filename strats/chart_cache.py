@@ -0,0 +1,110 @@
+# chart_cache.py
+"""
+    Incremental Chart Builds for the chart scripts.
+
+        input: CSV files, the columns a chart needs, and figure jobs
+        output: parsed columns from .npz sidecars, and only the stale PNGs redrawn
+
+    Parsed columns are cached next to their CSV in .chart_cache/<name>.npz,
+    keyed by the file's size and mtime; columnar (.npz) results need no
+    parsing and are read directly. Each PNG gets a .stamp file with the
+    inputs (and options) it was drawn from; a figure is re-rendered only when
+    that stamp no longer matches. Stale figures render in worker processes.
+"""
+
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from strats import io as strat_io
+
+CACHE_DIR = '.chart_cache'
+
+
+def _file_key(path):
+    stat = os.stat(path)
+    return [os.path.basename(path), stat.st_size, stat.st_mtime_ns]
+
+
+def _parse_columns(path, columns):
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return {c: np.zeros(0) for c in columns}
+        # Columns the file doesn't have are left out of the result
+        columns = [c for c in columns if c in header]
+        idx = [header.index(c) for c in columns]
+        values = [[] for _ in columns]
+        appends = [v.append for v in values]
+        for row in reader:
+            for append, i in zip(appends, idx):
+                append(row[i])
+    return {c: np.array(v, dtype=float) for c, v in zip(columns, values)}
+
+
+def load_columns(path, columns):
+    # {column: float array} (missing columns omitted), from the sidecar when the CSV hasn't changed since it was parsed
+    path = str(path)
+    columns = tuple(columns)
+    if strat_io.is_columnar(path):
+        return strat_io.read_columns(path, columns)
+    cache_dir = os.path.join(os.path.dirname(path), CACHE_DIR)
+    sidecar = os.path.join(cache_dir, os.path.basename(path) + '.npz')
+    key = json.dumps([_file_key(path), columns])
+    if os.path.exists(sidecar):
+        try:
+            with np.load(sidecar) as data:
+                if str(data['_key']) == key:
+                    return {c: data[c] for c in columns if c in data.files}
+        except (OSError, KeyError, ValueError):
+            pass  # unreadable or old-format sidecar: parse again
+    cols = _parse_columns(path, columns)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{sidecar}.{os.getpid()}.tmp.npz"
+    np.savez(tmp, _key=np.array(key), **cols)
+    os.replace(tmp, sidecar)
+    return cols
+
+
+def _stamp(inputs, options):
+    return json.dumps({'inputs': [_file_key(p) for p in inputs], 'options': options}, sort_keys=True)
+
+
+def _stamp_path(out_path):
+    return str(out_path) + '.stamp'
+
+
+def is_stale(out_path, inputs, options=None):
+    if not os.path.exists(out_path) or not os.path.exists(_stamp_path(out_path)):
+        return True
+    with open(_stamp_path(out_path)) as f:
+        return f.read() != _stamp(inputs, options)
+
+
+def _render(job):
+    fn, out_path, inputs, options, args = job
+    import matplotlib
+    matplotlib.use('Agg')
+    fn(*args)
+    with open(_stamp_path(out_path), 'w') as f:
+        f.write(_stamp(inputs, options))
+    return out_path
+
+
+def build(jobs, workers=None, force=False):
+    # jobs: [(render_fn, out_path, input_paths, options, args)]; render_fn(*args) must write out_path.
+    # Returns (rendered, skipped) output paths.
+    jobs = [(fn, str(out), [str(p) for p in inputs], options, args) for fn, out, inputs, options, args in jobs]
+    stale = [job for job in jobs if force or is_stale(job[1], job[2], job[3])]
+    skipped = [job[1] for job in jobs if job not in stale]
+    workers = min(workers or os.cpu_count() or 1, len(stale))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = list(pool.map(_render, stale))
+    else:
+        rendered = [_render(job) for job in stale]
+    return rendered, skipped
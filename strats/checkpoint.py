@@ -0,0 +1,119 @@
+# checkpoint.py
+"""
+    Checkpoints for long sweeps: finished points are on disk as soon as they finish.
+
+        input: the sweep's parameters, then each finished point range and its result
+        output: a JSON-lines file (header, then one line per point) and, on resume,
+                the results already there
+
+    The header holds the sweep parameters and the random state the rest of the
+    sweep depends on. Spin streams are counter-based (game_engine.rng), so a
+    point's position in them is fixed by (seed, point, iteration) and only the
+    seeds need recording: the seed base and, for random / bootstrap replay, the
+    seed the replay windows were drawn from. Resuming skips the recorded
+    points and simulates the rest, which gives the same output as a run that
+    was never interrupted (for unseeded live runs the remaining points are
+    fresh random draws, as they would have been anyway).
+
+    Each line is flushed as it is written, so a killed or interrupted sweep
+    keeps every finished point. fsync (which only matters if the machine
+    itself goes down) runs at most every SYNC_INTERVAL seconds rather than
+    once per point. A line cut short by a crash is dropped on resume and
+    that point simulated again. The file is removed once the sweep's outputs
+    are written, and its directory with it when nothing else is left there.
+"""
+
+import json
+import os
+import time
+
+FORMAT = 1
+CHECKPOINT_DIR = 'assignment_data/checkpoints'
+SYNC_INTERVAL = 1.0  # seconds between fsyncs of the appended lines
+
+
+def checkpoint_path(prefix, out_dir=CHECKPOINT_DIR):
+    return os.path.join(out_dir, f"{prefix}.ckpt.jsonl")
+
+
+def _normalise(value):
+    # Tuples become lists, as they will after a round trip through the file
+    return json.loads(json.dumps(value))
+
+
+def _read(path):
+    # (header, [(key, result)]) from the valid prefix of a checkpoint file
+    header = None
+    entries = []
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if header is None:
+                header = record
+            else:
+                entries.append((tuple(record['point']), tuple(record['result'])))
+    return header, entries
+
+
+class Checkpoint:
+    """Finished point ranges of one sweep, keyed by (N, M, first iteration, iterations)."""
+
+    def __init__(self, path, params, rng_state, resume=False, sync_interval=SYNC_INTERVAL):
+        # rng_state: seeds drawn for a fresh run (the replay seed); a resumed run takes the recorded ones
+        # sync_interval: seconds between fsyncs (0: after every point)
+        self.path = path
+        self.sync_interval = sync_interval
+        self.done = {}
+        self.rng_state = rng_state
+        params = _normalise(params)
+        header = None
+        if resume and os.path.exists(path):
+            header, entries = _read(path)
+        elif resume:
+            print(f"Note: no checkpoint at {path}; starting from the first point.")
+        if header is not None:
+            if header.get('format') != FORMAT or header.get('params') != params:
+                raise ValueError(f"{path} was written for different sweep parameters; run without --resume to start over.")
+            self.rng_state = header['rng']
+            self.done = dict(entries)
+            print(f"Resuming from {path}: {len(self.done)} point(s) already done.")
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # Rewrite rather than append, so a line cut short by a crash doesn't stay in the middle of the file
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(json.dumps({'format': FORMAT, 'params': params, 'rng': self.rng_state}) + '\n')
+            for key, result in self.done.items():
+                f.write(json.dumps({'point': list(key), 'result': list(result)}) + '\n')
+        os.replace(tmp, path)
+        self._file = open(path, 'a')
+        self._synced = time.monotonic()
+
+    def get(self, key):
+        return self.done.get(tuple(key))
+
+    def add(self, key, result):
+        self.done[tuple(key)] = tuple(result)
+        self._file.write(json.dumps({'point': list(key), 'result': list(result)}) + '\n')
+        self._file.flush()
+        if time.monotonic() - self._synced >= self.sync_interval:
+            os.fsync(self._file.fileno())
+            self._synced = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def discard(self):
+        # The sweep finished and its outputs are written; nothing left to resume
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        try:
+            os.rmdir(os.path.dirname(self.path) or '.')
+        except OSError:
+            pass  # other checkpoints (or files) are still there
@@ -0,0 +1,173 @@
+# events.py
+"""
+    Event-Driven Martingale Replay for American Roulette.
+
+        input: initial balance, buyout, bet spec, sequence buffer (+ next-win index)
+        output: the same summary run_martingale returns with keep_rows=False
+
+    A Martingale loss streak is closed-form: after j losses from wager w the
+    balance is down w * (2^j - 1) and the wager is w * 2^j. With an index of
+    the next winning round from every position, the engine jumps straight to
+    the next win (or works out the all-in/bust round arithmetically), so a
+    replay costs time proportional to the number of wins, not rounds.
+
+    Only bets whose every losing index loses the whole stake qualify; pushes
+    or partial losses (e.g. red+1st12) break the closed form and use the
+    round-by-round engine instead.
+"""
+
+import math
+
+import numpy as np
+
+from game_engine import build_bet as bb
+from strats import io as strat_io
+from strats import replay
+from strats.martingale import run_martingale
+
+
+def supports_bet(bet_spec):
+    return all(mult > 0 or mult == -1.0 for mult in bb.compile_bet(bet_spec).net_table)
+
+
+def build_next_win(outcomes, bet_spec=None):
+    # next_win[p] = first round >= p that the bet wins (len(outcomes) if none)
+    length = len(outcomes)
+    dtype = np.int32 if length < 2**31 - 1 else np.int64
+    win_mask = np.array([mult > 0 for mult in bb.compile_bet(bet_spec).net_table])
+    next_win = np.full(length + 1, length, dtype=dtype)
+    wins = np.flatnonzero(win_mask[np.asarray(outcomes)])
+    next_win[wins] = wins
+    return np.minimum.accumulate(next_win[::-1])[::-1]
+
+
+# (id(buffer), spec) -> (buffer, next_win); the buffer is kept so its id can't be reused while cached.
+# Bounded like strats.io's loaded sequences, so long-lived workers (serve.py) don't keep every sequence.
+_NEXT_WIN_CACHE = {}
+_NEXT_WIN_MAX = strat_io.LOADED_MAX
+
+
+def cached_next_win(outcomes, bet_spec=None):
+    # One index per loaded sequence and bet, shared by every grid point in a sweep
+    key = (id(outcomes), bb.compile_bet(bet_spec).spec)
+    hit = _NEXT_WIN_CACHE.pop(key, None)
+    if hit is None or hit[0] is not outcomes:
+        while len(_NEXT_WIN_CACHE) >= _NEXT_WIN_MAX:
+            _NEXT_WIN_CACHE.pop(next(iter(_NEXT_WIN_CACHE)))  # least recently used
+        hit = (outcomes, build_next_win(outcomes, bet_spec))
+    _NEXT_WIN_CACHE[key] = hit
+    return hit[1]
+
+
+def _bust_streak(balance, wager):
+    # Index of the first loss in a streak that empties the balance (all-in or exact):
+    # smallest j with wager * (2^(j+1) - 1) >= balance. log2 gets it within one step.
+    j = max(0, math.ceil(math.log2(balance / wager + 1)) - 1)
+    while j and wager * ((1 << j) - 1) >= balance:
+        j -= 1
+    while wager * ((1 << (j + 1)) - 1) < balance:
+        j += 1
+    return j
+
+
+def run_martingale_events(initial_balance, buyout, outcomes, bet_spec=None, next_win=None, start=0):
+    if not supports_bet(bet_spec):
+        raise ValueError("event-driven replay needs a bet where every losing spin loses the whole stake.")
+    if next_win is None:
+        next_win = build_next_win(outcomes, bet_spec)
+    net_table = bb.compile_bet(bet_spec).net_table
+    length = len(outcomes)
+    first_win = int(next_win[0])
+
+    balance = initial_balance
+    target_balance = initial_balance + buyout
+    current_wager = 1.0
+    round_count = 0
+
+    while 0 < balance < target_balance and round_count < length:
+        # Rounds until the next win from here, wrapping around the buffer (strided/random windows)
+        pos = (start + round_count) % length
+        win_pos = int(next_win[pos])
+        if win_pos == length:
+            win_pos = first_win + length
+        losses = win_pos - pos
+        remaining = length - round_count
+
+        # Common case: the streak (and the winning stake) is affordable outright
+        if losses < remaining and losses < 64 and current_wager * ((1 << (losses + 1)) - 1) < balance:
+            stake = current_wager * (1 << losses)
+            balance += stake * net_table[int(outcomes[win_pos % length])] - (stake - current_wager)
+            round_count += losses + 1
+            current_wager = 1.0
+            continue
+
+        bust_at = _bust_streak(balance, current_wager)
+        if bust_at < losses and bust_at < remaining:
+            # Bust inside the streak: the last loss takes whatever is left
+            round_count += bust_at + 1
+            before = balance - current_wager * ((1 << bust_at) - 1)
+            balance = before - min(current_wager * (1 << bust_at), before)
+            break
+        if losses >= remaining:
+            # Sequence ends inside the streak
+            balance -= current_wager * ((1 << remaining) - 1)
+            current_wager *= (1 << remaining)
+            round_count = length
+            break
+
+        before = balance - current_wager * ((1 << losses) - 1)
+        stake = min(current_wager * (1 << losses), before)
+        balance = before + stake * net_table[int(outcomes[win_pos % length])]
+        round_count += losses + 1
+        current_wager = 1.0
+
+    if balance >= target_balance:
+        outcome_label = "SUCCESS"
+    elif round_count >= length:
+        outcome_label = "DONE"
+    else:
+        outcome_label = "BUST"
+
+    return {
+        'rows': [],
+        'round_count': round_count,
+        'outcome_label': outcome_label,
+        'target_balance': target_balance,
+        'final_balance': balance,
+    }
+
+
+def simulate_point_events(
+    n,
+    m,
+    iterations,
+    outcomes,
+    bet_spec='red',
+    replay_starts=None,
+    block_size=None,
+    next_win=None,
+    first_iteration=0,
+    stats=None,
+):
+    if not iterations:
+        return 0, 0.0, 0.0
+    eligible = supports_bet(bet_spec)
+    if eligible and next_win is None:
+        next_win = cached_next_win(outcomes, bet_spec)
+
+    wins = 0
+    total_return = 0.0
+    for i in range(first_iteration, first_iteration + iterations):
+        starts = replay_starts[i] if replay_starts is not None else (0,)
+        if eligible and len(starts) == 1:
+            result = run_martingale_events(n, m, outcomes, bet_spec=bet_spec, next_win=next_win, start=int(starts[0]))
+        else:
+            # Bootstrap windows and partial-loss bets replay round by round
+            window = replay.replay_window(outcomes, starts, block_size)
+            result = run_martingale(n, m, bet_spec=bet_spec, outcomes=window, keep_rows=False)
+        won = result['outcome_label'] == 'SUCCESS'
+        wins += won
+        total_return += (result['final_balance'] - n)
+        if stats is not None:
+            stats.add(won, result['final_balance'] - n)
+    return wins, wins / iterations, total_return / iterations
@@ -0,0 +1,280 @@
+# exact.py
+"""
+    Exact Markov-Chain Solver for the Martingale Strategy.
+
+        input: initial balance (N), buyout (M), bet spec
+        output: P(SUCCESS), expected final balance, expected rounds and
+                (optionally) the distribution of round_count
+
+    For a fixed bet, run_martingale is a finite absorbing Markov chain on
+    (balance, current_wager). States are explored once and memoized, grouped
+    into strongly connected components, and solved successor-first. Cycles
+    only close through a win (an all-in win can leave the balance lower than
+    where the streak began), so each component needs a dense solve over its
+    post-win states only; every other state is a weighted sum.
+"""
+
+from collections import defaultdict
+
+import numpy as np
+
+from game_engine import build_bet as bb
+
+# Balances are rounded to this many decimals so float noise doesn't split states
+_PRECISION = 9
+
+# Partial-win bets can scatter all-in balances over a dense set of values; give up past this
+MAX_STATES = 500_000
+
+
+class StateLimitError(ValueError):
+    """The chain for this bet and point has more than max_states states; simulate it instead."""
+
+
+def _key(value):
+    return round(value, _PRECISION)
+
+
+def _state(balance, wager):
+    # Any wager the balance can't cover plays as the same all-in, so cap it at the balance
+    balance = _key(balance)
+    if 0 < balance < wager:
+        wager = balance
+    return balance, wager
+
+
+def _outcome_classes(bet):
+    # Group the 38 winning indices by net multiplier: [(probability, multiplier), ...]
+    counts = defaultdict(int)
+    for mult in bet.net_table:
+        counts[mult] += 1
+    return [(count / 38, mult) for mult, count in sorted(counts.items())]
+
+
+def _build_chain(initial_balance, target_balance, classes, max_states):
+    start = _state(initial_balance, 1.0)
+    transitions = {}
+    terminals = {}
+    stack = [start]
+
+    while stack:
+        state = stack.pop()
+        if state in transitions or state in terminals:
+            continue
+        balance, wager = state
+        if not 0 < balance < target_balance:
+            terminals[state] = balance
+            continue
+        if len(transitions) >= max_states:
+            raise StateLimitError(
+                f"exact solver exceeded {max_states} states for this bet; use the batch or scalar engine."
+            )
+
+        stake = wager  # already capped at the balance (all-in)
+        edges = defaultdict(float)
+        for prob, mult in classes:
+            net = stake * mult
+            next_wager = 1.0 if net > 0 else stake * 2
+            edges[_state(balance + net, next_wager)] += prob
+        transitions[state] = list(edges.items())
+        stack.extend(nxt for nxt, _ in transitions[state])
+
+    return start, transitions, terminals
+
+
+def _components(transitions):
+    # Iterative Tarjan; components come out successors-first
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    result = []
+    counter = 0
+
+    for root in transitions:
+        if root in index:
+            continue
+        work = [(root, iter(transitions[root]))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, edges = work[-1]
+            advanced = False
+            for nxt, _ in edges:
+                if nxt not in transitions:
+                    continue
+                if nxt not in index:
+                    index[nxt] = low[nxt] = counter
+                    counter += 1
+                    stack.append(nxt)
+                    on_stack.add(nxt)
+                    work.append((nxt, iter(transitions[nxt])))
+                    advanced = True
+                    break
+                if nxt in on_stack:
+                    low[node] = min(low[node], index[nxt])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                result.append(component)
+    return result
+
+
+def _expand(state, transitions, values, pivots, exprs):
+    # state value as (constant, {pivot position: coefficient}); non-pivot self-loops are divided out
+    const = [0.0, 0.0, 1.0]
+    coeffs = defaultdict(float)
+    p_self = 0.0
+    for nxt, prob in transitions[state]:
+        if nxt == state and state not in pivots:
+            p_self += prob
+        elif nxt in pivots:
+            coeffs[pivots[nxt]] += prob
+        elif nxt in exprs:
+            nxt_const, nxt_coeffs = exprs[nxt]
+            for k in range(3):
+                const[k] += prob * nxt_const[k]
+            for pos, coeff in nxt_coeffs.items():
+                coeffs[pos] += prob * coeff
+        else:
+            for k, value in enumerate(values[nxt]):
+                const[k] += prob * value
+    if p_self >= 1.0:
+        raise ValueError("bet never terminates from some states (singular chain).")
+    if p_self:
+        scale = 1.0 / (1.0 - p_self)
+        const = [c * scale for c in const]
+        coeffs = {pos: coeff * scale for pos, coeff in coeffs.items()}
+    return const, coeffs
+
+
+def _solve_component(component, transitions, values):
+    # Losses and pushes never raise the balance and only grow the wager, so every cycle passes
+    # through a win. Post-win states (pivots) get a dense system; the rest are eliminated in
+    # (balance, -wager) order, which puts each state after its non-win successors.
+    members = set(component)
+    pivot_states = sorted({
+        nxt
+        for state in component
+        for nxt, _ in transitions[state]
+        if nxt in members and nxt[0] > state[0]
+    })
+    pivots = {state: i for i, state in enumerate(pivot_states)}
+
+    exprs = {}
+    for state in sorted((s for s in component if s not in pivots), key=lambda s: (s[0], -s[1])):
+        exprs[state] = _expand(state, transitions, values, pivots, exprs)
+
+    solution = np.zeros((len(pivot_states), 3))
+    if pivot_states:
+        size = len(pivot_states)
+        matrix = np.eye(size)
+        rhs = np.zeros((size, 3))
+        for i, state in enumerate(pivot_states):
+            const, coeffs = _expand(state, transitions, values, pivots, exprs)
+            rhs[i] = const
+            for pos, coeff in coeffs.items():
+                matrix[i, pos] -= coeff
+        try:
+            solution = np.linalg.solve(matrix, rhs)
+        except np.linalg.LinAlgError:
+            raise ValueError("bet never terminates from some states (singular chain).")
+        for state, row in zip(pivot_states, solution):
+            values[state] = tuple(float(v) for v in row)
+
+    for state, (const, coeffs) in exprs.items():
+        values[state] = tuple(
+            const[k] + sum(coeff * solution[pos, k] for pos, coeff in coeffs.items())
+            for k in range(3)
+        )
+
+
+def _solve_values(transitions, terminals, target_balance):
+    # values[state] = (P(SUCCESS), E[final balance], E[rounds remaining])
+    values = {
+        state: (1.0 if balance >= target_balance else 0.0, balance, 0.0)
+        for state, balance in terminals.items()
+    }
+    for component in _components(transitions):
+        _solve_component(component, transitions, values)
+    return values
+
+
+def _round_distribution(start, transitions, tol, max_rounds):
+    # Forward-propagate probability mass; dist[t] = P(round_count == t)
+    if start not in transitions:
+        return [1.0], 0.0
+    dist = [0.0]
+    alive = {start: 1.0}
+    rounds = 0
+    while alive and rounds < max_rounds:
+        rounds += 1
+        absorbed = 0.0
+        nxt_alive = defaultdict(float)
+        for state, mass in alive.items():
+            for nxt, prob in transitions[state]:
+                if nxt in transitions:
+                    nxt_alive[nxt] += mass * prob
+                else:
+                    absorbed += mass * prob
+        dist.append(absorbed)
+        alive = nxt_alive
+        if sum(alive.values()) < tol:
+            break
+    return dist, sum(alive.values())
+
+
+def solve_martingale(
+    initial_balance,
+    buyout,
+    bet_spec=None,
+    round_distribution=False,
+    tol=1e-12,
+    max_rounds=1_000_000,
+    max_states=MAX_STATES,
+):
+    bet = bb.compile_bet(bet_spec)
+    target_balance = initial_balance + buyout
+    start, transitions, terminals = _build_chain(
+        initial_balance,
+        target_balance,
+        _outcome_classes(bet),
+        max_states,
+    )
+    values = _solve_values(transitions, terminals, target_balance)
+    prob_win, expected_final, expected_rounds = values[start]
+
+    result = {
+        'prob_win': prob_win,
+        'prob_bust': 1.0 - prob_win,
+        'expected_final_balance': expected_final,
+        'expected_return': expected_final - initial_balance,
+        'expected_rounds': expected_rounds,
+        'target_balance': target_balance,
+        'states': len(transitions),
+    }
+    if round_distribution:
+        dist, residual = _round_distribution(start, transitions, tol, max_rounds)
+        result['round_distribution'] = dist
+        result['residual_mass'] = residual
+    return result
+
+
+def simulate_point_exact(n, m, iterations, bet_spec='red'):
+    # Same (wins, prob, exp) shape as sweeper.simulate_point; wins is the expected count (a float, not rounded)
+    result = solve_martingale(n, m, bet_spec=bet_spec)
+    prob = result['prob_win']
+    return prob * iterations, prob, result['expected_return']
@@ -0,0 +1,94 @@
+# first_passage.py
+"""
+    First-Passage Engine: every profit target M from one session.
+
+        input: bankroll N, the buyouts to answer, iterations, bet, strategy and RNG / sequence
+        output: wins and return sums per buyout, from one session per iteration
+
+    For a fixed N, bet, strategy and spin stream, sessions with different
+    targets play the same rounds until the balance first reaches N + M (no
+    strategy looks at the target). So one session played up to the largest
+    target, recording each new running maximum of the balance, answers all
+    of them: target T succeeds at the first recorded maximum >= T, with that
+    balance as its final balance; a target never reached ends where the
+    session ended (bust, or the end of the replayed sequence).
+"""
+
+import numpy as np
+
+from game_engine import build_bet as bb
+from game_engine import roulette
+from strats import replay
+from strats import strategies
+
+
+def run_first_passage(strategy, initial_balance, max_buyout, bet_spec=None, outcomes=None, rng=None):
+    # One session up to initial_balance + max_buyout (or bust / end of outcomes), rounds exactly as in
+    # strats.martingale.run_strategy. Returns (maxima, final_balance): the balance every time it set a
+    # new high, starting with initial_balance.
+    strategy = strategies.get_strategy(strategy)
+    net_table = bb.compile_bet(bet_spec).net_table
+    balance = initial_balance
+    top = initial_balance + max_buyout
+    state = strategy.start()
+    maxima = [balance]
+    max_rounds = len(outcomes) if outcomes is not None and len(outcomes) else None
+    round_count = 0
+
+    while 0 < balance < top and (max_rounds is None or round_count < max_rounds):
+        round_count += 1
+        current_wager = strategy.wager(state)
+        if current_wager > balance:
+            current_wager = balance
+        if max_rounds is not None:
+            win_index = int(outcomes[round_count - 1])
+        else:
+            win_index = roulette.spin(rng=rng)
+        net_result = current_wager * net_table[win_index]
+        balance += net_result
+        state = strategy.update(state, current_wager, net_result > 0)
+        if balance > maxima[-1]:
+            maxima.append(balance)
+
+    return maxima, balance
+
+
+def settle(maxima, final_balance, targets):
+    # (reached, final balance) per target balance: the first new high >= target, else the session's end
+    maxima = np.asarray(maxima, dtype=float)
+    idx = np.searchsorted(maxima, targets, side='left')
+    reached = idx < len(maxima)
+    finals = np.where(reached, maxima[np.minimum(idx, len(maxima) - 1)], final_balance)
+    return reached, finals
+
+
+def simulate_targets(
+    n,
+    buyouts,
+    iterations,
+    bet_spec='red',
+    seed_base=None,
+    outcomes=None,
+    replay_starts=None,
+    block_size=None,
+    strategy='martingale',
+    first_iteration=0,
+):
+    # (wins, return sums) arrays aligned with buyouts, over iterations first_iteration.. of bankroll n.
+    # Live RNG draws from the (seed, (n, 'first_passage'), iteration) stream, shared by all targets.
+    targets = n + np.asarray(buyouts, dtype=float)
+    max_buyout = max(buyouts) if len(buyouts) else 0
+    wins = np.zeros(len(buyouts), dtype=np.int64)
+    return_sums = np.zeros(len(buyouts))
+    for i in range(first_iteration, first_iteration + iterations):
+        spin_rng = None
+        sequence = outcomes
+        if outcomes is None and seed_base is not None:
+            spin_rng = roulette.get_rng(seed_base, stream=((n, 'first_passage'), i))
+        elif outcomes is not None and replay_starts is not None:
+            sequence = replay.replay_window(outcomes, replay_starts[i], block_size)
+        maxima, final_balance = run_first_passage(strategy, n, max_buyout, bet_spec, sequence, spin_rng)
+        reached, finals = settle(maxima, final_balance, targets)
+        wins += reached
+        return_sums += finals - n
+    return wins, return_sums
@@ -0,0 +1,170 @@
+# importance.py
+"""
+    Importance Sampling for rare busts and rare successes.
+
+        input: a grid point (N, buyout), iterations, bet, strategy, seed and a tilt
+        output: unbiased Prob_Win / Prob_Bust / Expected_Return, their standard errors
+                and the effective sample size behind each probability
+
+    Spins are drawn with the bet's winning slots (net > 0) carrying total
+    probability `tilt` instead of their share of the 38 slots, spread evenly
+    over them (likewise the losing slots with 1 - tilt). A run's weight is the
+    product over its spins of p(slot) / q(slot), the likelihood ratio of the
+    fair wheel to the tilted one, so mean(weight * indicator) is an unbiased
+    estimate under the fair wheel. Tilt above the bet's win probability to see
+    rare successes (small N, large M), below it to see rare busts (large N,
+    small M). The event the tilt aims at is estimated directly and the other
+    as its complement (a live session ends in one or the other), so the two
+    always add up to 1 and the common event isn't estimated from the
+    heavy-tailed weights meant for the rare one.
+
+    ESS is Kish's (sum w)^2 / sum w^2 over the runs that ended in the event:
+    how many plain samples of it the weighted ones are worth. With a tilt too
+    far off, the weights are heavy-tailed: the estimate rests on a few runs
+    and its standard error is itself badly underestimated. A point whose ESS
+    for the targeted event is below MIN_ESS (or MIN_ESS_FRACTION of its
+    iterations), or whose estimate came out above 1 and was clamped, is
+    flagged (the Unreliable column) and reported on stderr.
+"""
+
+import math
+import sys
+
+import numpy as np
+
+from game_engine import build_bet as bb
+from game_engine import rng
+from strats.martingale import run_strategy
+
+MIN_ESS = 30
+MIN_ESS_FRACTION = 0.005
+
+
+def tilted_wheel(bet_spec, tilt):
+    # (cumulative slot probabilities, log p/q per slot) with total probability tilt on the winning slots
+    if not 0 < tilt < 1:
+        raise ValueError(f"the importance tilt is a per-spin win probability in (0, 1), got {tilt}.")
+    net_table = bb.compile_bet(bet_spec).net_table
+    winning = [net > 0 for net in net_table]
+    wins = sum(winning)
+    if wins in (0, rng.WHEEL_SLOTS):
+        raise ValueError(f"bet {bet_spec!r} wins on every slot or none; there is nothing to tilt.")
+    fair = 1 / rng.WHEEL_SLOTS
+    probs = [tilt / wins if won else (1 - tilt) / (rng.WHEEL_SLOTS - wins) for won in winning]
+    cdf = np.cumsum(probs)
+    cdf[-1] = 1.0
+    return cdf, tuple(math.log(fair / p) for p in probs)
+
+
+class TiltedStream(rng.Stream):
+    """rng.Stream drawing from the tilted wheel, keeping the run's log likelihood ratio in log_weight."""
+
+    __slots__ = ('_cdf', '_log_ratio', 'log_weight')
+
+    def __init__(self, wheel, seed=None, point=(), index=0):
+        super().__init__(seed, point, index)
+        self._cdf, self._log_ratio = wheel
+        self.log_weight = 0.0
+
+    def _next_block(self):
+        # Same block schedule as rng.Stream, uniforms mapped through the tilted CDF instead of integers
+        uniforms = self._gen.random(self._block)
+        self._block = min(self._block * 2, rng.MAX_BLOCK)
+        return np.searchsorted(self._cdf, uniforms, side='right').astype(np.uint8)
+
+    def randint(self, a, b):
+        # Only whole-wheel draws (roulette.spin) are tilted
+        if a != 0 or b != rng.WHEEL_SLOTS - 1:
+            raise ValueError("a tilted stream only draws winning indices 0-37.")
+        value = super().randint(a, b)
+        self.log_weight += self._log_ratio[value]
+        return value
+
+    def spins(self, count):
+        values = super().spins(count)
+        self.log_weight += float(np.asarray(self._log_ratio)[values].sum())
+        return values
+
+
+def _mean_se(values):
+    if len(values) < 2:
+        return (float(values.mean()) if len(values) else 0.0), math.inf
+    return float(values.mean()), float(values.std(ddof=1)) / math.sqrt(len(values))
+
+
+def _ess(weights):
+    total = float(weights.sum())
+    squares = float((weights ** 2).sum())
+    return total * total / squares if squares > 0 else 0.0
+
+
+def problems(result, target='win'):
+    # Why a summarize() result can't be trusted; empty if it can
+    count = result[3]
+    ess = result[8] if target == 'win' else result[9]
+    threshold = max(MIN_ESS, MIN_ESS_FRACTION * count)
+    reasons = []
+    if ess < threshold:
+        reasons.append(f"ESS_{target.title()} {ess:.1f} below {threshold:g}")
+    if result[11]:
+        reasons.append(f"Prob_{target.title()} came out above 1 and was clamped")
+    return reasons
+
+
+def target_event(bet_spec, tilt):
+    # 'win' when the tilt favours the bet (rare successes), 'bust' when it favours the house
+    net_table = bb.compile_bet(bet_spec).net_table
+    return 'win' if tilt >= sum(net > 0 for net in net_table) / rng.WHEEL_SLOTS else 'bust'
+
+
+def summarize(weights, won, ret, target='win'):
+    # (wins, prob_win, expected_return, iterations, se_prob, se_return, prob_bust, se_bust, ess_win, ess_bust,
+    #  unreliable, clamped). target: the event estimated directly; the other is its complement.
+    weights = np.asarray(weights, dtype=float)
+    won = np.asarray(won, dtype=bool)
+    ret = np.asarray(ret, dtype=float)
+    direct, se = _mean_se(weights * (won if target == 'win' else ~won))
+    expected, se_return = _mean_se(weights * ret)
+    # Unbiased, but a single heavy weight can push it past 1
+    clamped = direct > 1
+    direct = min(direct, 1.0)
+    prob = direct if target == 'win' else 1.0 - direct
+    count = len(weights)
+    result = (
+        int(round(prob * count)),
+        prob,
+        expected,
+        count,
+        se,
+        se_return,
+        1.0 - prob,
+        se,
+        _ess(weights[won]),
+        _ess(weights[~won]),
+        0.0,
+        float(clamped),
+    )
+    return result[:10] + (float(bool(problems(result, target))), result[11])
+
+
+def warn_unreliable(n, m, result, target='win', out=None):
+    # One line on out (default: the current sys.stderr) for a flagged point; returns whether it was flagged
+    reasons = problems(result, target)
+    if reasons:
+        print(f"Warning: importance estimate at N={n} M={m} is unreliable ({'; '.join(reasons)}); "
+              f"try a tilt closer to the bet's odds.", file=out or sys.stderr)
+    return bool(reasons)
+
+
+def simulate_point(n, m, iterations, tilt, bet_spec='red', seed=None, strategy='martingale', first_iteration=0, timer=None):
+    # Importance-sampled estimates for iterations first_iteration.. of point (n, m) (see summarize)
+    wheel = tilted_wheel(bet_spec, tilt)
+    target = target_event(bet_spec, tilt)
+    weights, won, ret = [], [], []
+    for i in range(first_iteration, first_iteration + iterations):
+        spins = TiltedStream(wheel, seed, (n, m, 'tilted'), i)
+        result = run_strategy(strategy, n, m, bet_spec=bet_spec, rng=spins, keep_rows=False, timer=timer)
+        weights.append(math.exp(spins.log_weight))
+        won.append(result['outcome_label'] == 'SUCCESS')
+        ret.append(result['final_balance'] - n)
+    return summarize(weights, won, ret, target)
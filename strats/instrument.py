@@ -0,0 +1,109 @@
+# instrument.py
+"""
+    Instrumentation for sweeps and single runs.
+
+        input: phase timings and counters reported by the engines as they run
+        output: totals per phase, rounds/sec, runs/sec and JSON-lines records
+
+    A Recorder is only passed to the round loop when instrumentation is on,
+    so normal runs pay for a None check and nothing else. Recorders are plain
+    dicts underneath (snapshot / merge) so worker processes can send theirs
+    back with each grid point.
+
+    Phases (strats.martingale.run_strategy):
+        bet         - compiling the bet spec
+        spin        - drawing (or replaying) the winning index
+        payout      - net result and balance update
+        bookkeeping - progression update and per-round rows
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import time
+from contextlib import contextmanager
+
+PHASES = ('bet', 'spin', 'payout', 'bookkeeping')
+
+
+class Recorder:
+    """Accumulated seconds per phase plus named counters (runs, rounds, ...)."""
+
+    __slots__ = ('phases', 'counters')
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        return {'phases': dict(self.phases), 'counters': dict(self.counters)}
+
+    def merge(self, snapshot):
+        for phase, seconds in snapshot.get('phases', {}).items():
+            self.add(phase, seconds)
+        for name, amount in snapshot.get('counters', {}).items():
+            self.count(name, amount)
+
+
+class MetricsLog:
+    """Append-only JSON lines file; every record gets the event name and a timestamp."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self._file = open(path, 'a')
+
+    def emit(self, event, **fields):
+        record = {'event': event, 'time': round(time.time(), 3)}
+        record.update(fields)
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def rates(counters, seconds):
+    # {'runs': 10, 'rounds': 250} over 2s -> {'runs_per_sec': 5.0, 'rounds_per_sec': 125.0}
+    if seconds <= 0:
+        return {}
+    return {f"{name}_per_sec": round(amount / seconds, 1) for name, amount in counters.items()}
+
+
+def format_phases(recorder):
+    # "spin 41.2% | payout 20.3% | ..." over the timed phases
+    total = sum(recorder.phases.values())
+    if not total:
+        return ''
+    parts = sorted(recorder.phases.items(), key=lambda kv: kv[1], reverse=True)
+    return ' | '.join(f"{phase} {seconds:.2f}s ({seconds / total:.1%})" for phase, seconds in parts)
+
+
+@contextmanager
+def profiled(path, top=25):
+    # cProfile the block, dump pstats to path and print the top entries by cumulative time
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        profile.dump_stats(path)
+        pstats.Stats(profile).sort_stats('cumulative').print_stats(top)
+        print(f"Profile saved to {path} (open with python -m pstats {path})")
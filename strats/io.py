@@ -1,17 +1,119 @@
 """
     Shared I/O helpers for strategy scripts.
+
+    Sequences load as an array of winning indices (0-37), either parsed from
+    a `Round, Winning Number, Winning Index, Color` CSV or memory-mapped from
+    the binary format: a 16-byte header (b'RSEQ', version, 3 pad bytes,
+    uint64 spin count) followed by one uint8 winning index per spin.
+
+    Run logs and sweep tables can also be saved as typed columns in an
+    uncompressed .npz (exact floats, no per-cell formatting or parsing);
+    export_csv turns either kind back into the CSV the scripts would have
+    written.
 """
 
 import csv
 import os
+import struct
+from array import array
+from contextlib import contextmanager
+
+import numpy as np
+
+from game_engine import roulette
+
+BINARY_SUFFIX = '.rseq'
+SEQUENCE_FIELDS = ['Round', 'Winning Number', 'Winning Index', 'Color']
+
+_MAGIC = b'RSEQ'
+_VERSION = 1
+_HEADER = struct.Struct('<4sB3xQ')
+COLUMNAR_SUFFIX = '.npz'
+RUN_FIELDS = ['Round', 'Bet', 'Winning Number', 'Color', 'Net', 'Balance']
+SWEEP_FIELDS = ['N', 'M', 'Wins', 'Iterations', 'Prob_Win', 'Expected_Return']
+SWEEP_CI_FIELDS = ['CI_Prob_Win', 'CI_Expected_Return']
+SWEEP_SE_FIELDS = ['SE_Prob_Win', 'SE_Expected_Return']
+SWEEP_IS_FIELDS = ['Prob_Bust', 'SE_Prob_Bust', 'ESS_Win', 'ESS_Bust', 'Unreliable']
+_LOADED = {}
+LOADED_MAX = 8  # sequences kept per process by load_sequence_cached
+
+
+def is_binary_sequence(sequence_path):
+    return sequence_path.lower().endswith(BINARY_SUFFIX)
 
 
 def load_sequence(sequence_path):
     if not sequence_path or not os.path.exists(sequence_path):
-        return []
+        return None
+    if is_binary_sequence(sequence_path):
+        return load_sequence_binary(sequence_path)
     with open(sequence_path, 'r') as f:
         reader = csv.DictReader(f)
-        return list(reader)
+        return np.array([int(row['Winning Index']) for row in reader], dtype=np.uint8)
+
+
+def load_sequence_cached(sequence_path):
+    # load_sequence for long-lived processes (serve.py workers): each file is parsed once
+    # per process and reused until its size or mtime changes. The array is read-only.
+    if not sequence_path or not os.path.exists(sequence_path):
+        return None
+    stat = os.stat(sequence_path)
+    key = (os.path.abspath(sequence_path), stat.st_size, stat.st_mtime_ns)
+    if key not in _LOADED:
+        if len(_LOADED) >= LOADED_MAX:
+            _LOADED.pop(next(iter(_LOADED)))
+        outcomes = load_sequence(sequence_path)
+        outcomes.flags.writeable = False
+        _LOADED[key] = outcomes
+    return _LOADED[key]
+
+
+def load_sequence_binary(sequence_path):
+    with open(sequence_path, 'rb') as f:
+        magic, version, count = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"{sequence_path} is not a version {_VERSION} binary sequence file.")
+    if not count:
+        return np.zeros(0, dtype=np.uint8)
+    # Read-only map: pages are shared between processes replaying the same file
+    return np.memmap(sequence_path, dtype=np.uint8, mode='r', offset=_HEADER.size, shape=(count,))
+
+
+def sequence_header(count):
+    # Header for a binary sequence of `count` spins (for writers that stream the body)
+    return _HEADER.pack(_MAGIC, _VERSION, count)
+
+
+def write_sequence_binary(indices, sequence_path):
+    indices = np.asarray(indices, dtype=np.uint8)
+    with open(sequence_path, 'wb') as f:
+        f.write(sequence_header(indices.size))
+        f.write(indices.tobytes())
+    return sequence_path
+
+
+def write_sequence_csv(indices, sequence_path):
+    with open(sequence_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(SEQUENCE_FIELDS)
+        for r, win_index in enumerate(indices, 1):
+            win_num = roulette.index_to_num(int(win_index))
+            writer.writerow([r, win_num, int(win_index), roulette.num_to_color(win_num)])
+    return sequence_path
+
+
+def convert_sequence(src_path, dst_path=None):
+    # CSV -> binary or binary -> CSV, picked from the source extension
+    to_binary = not is_binary_sequence(src_path)
+    if dst_path is None:
+        stem = os.path.splitext(src_path)[0]
+        dst_path = stem + (BINARY_SUFFIX if to_binary else '.csv')
+    indices = load_sequence(src_path)
+    if indices is None:
+        raise ValueError(f"Sequence file not found: {src_path}")
+    if to_binary:
+        return write_sequence_binary(indices, dst_path)
+    return write_sequence_csv(indices, dst_path)
 
 
 def write_results(rows, out_dir, filename, fieldnames):
@@ -22,3 +124,125 @@ def write_results(rows, out_dir, filename, fieldnames):
         writer.writeheader()
         writer.writerows(rows)
     return path
+
+
+@contextmanager
+def stream_results(out_dir, filename, fieldnames):
+    # Yields (path, write_row) so rows can be written as they are produced
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, filename)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        yield path, writer.writerow
+
+
+def is_columnar(path):
+    return str(path).lower().endswith(COLUMNAR_SUFFIX)
+
+
+def write_columns(path, kind, columns):
+    # columns: {name: array}; kind ('run' or 'sweep') tells export_csv how to format them
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp, _kind=np.array(kind), **columns)
+    os.replace(tmp, path)
+    return path
+
+
+def read_columns(path, columns=None):
+    # {column: array} for the requested columns (all by default); missing columns are omitted
+    with np.load(path) as data:
+        names = [c for c in data.files if c != '_kind'] if columns is None else columns
+        return {c: data[c] for c in names if c in data.files}
+
+
+def columns_kind(path):
+    with np.load(path) as data:
+        return str(data['_kind']) if '_kind' in data.files else None
+
+
+@contextmanager
+def stream_run_columns(out_dir, filename):
+    # stream_results for .npz run logs: rows are kept as typed columns and saved when the block ends
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, filename)
+    rounds, indices, nets, balances = array('q'), array('B'), array('d'), array('d')
+    bet = ['']
+
+    def write_row(row):
+        rounds.append(row['Round'])
+        indices.append(row['_win_index'])
+        nets.append(row['_net_raw'])
+        balances.append(row['_balance_raw'])
+        bet[0] = row['Bet']
+
+    try:
+        yield path, write_row
+    finally:
+        write_columns(path, 'run', {
+            'Round': np.frombuffer(rounds, dtype=np.int64),
+            'Bet': np.array(bet[0]),
+            'Winning Index': np.frombuffer(indices, dtype=np.uint8),
+            'Net': np.frombuffer(nets, dtype=np.float64),
+            'Balance': np.frombuffer(balances, dtype=np.float64),
+        })
+
+
+def run_rows(columns):
+    # CSV row dicts (RUN_FIELDS) for a columnar run log
+    bet = str(columns['Bet'])
+    for r, win_index, net, balance in zip(
+        columns['Round'].tolist(),
+        columns['Winning Index'].tolist(),
+        columns['Net'].tolist(),
+        columns['Balance'].tolist(),
+    ):
+        win_label = roulette.index_to_num(win_index)
+        yield {
+            'Round': r,
+            'Bet': bet,
+            'Winning Number': win_label,
+            'Color': roulette.num_to_color(win_label),
+            'Net': f"{net:+.2f}",
+            'Balance': f"{balance:.2f}",
+        }
+
+
+def sweep_fields(columns):
+    return SWEEP_FIELDS + [f for f in SWEEP_CI_FIELDS + SWEEP_SE_FIELDS + SWEEP_IS_FIELDS if f in columns]
+
+
+def sweep_rows(columns):
+    # CSV row dicts for a sweep table (SWEEP_FIELDS, plus the CI / SE / importance columns when present)
+    fields = sweep_fields(columns)
+    values = [columns[f].tolist() for f in fields]
+    for row in zip(*values):
+        row = dict(zip(fields, row))
+        for f in ['Prob_Win', 'Expected_Return', 'Prob_Bust', 'SE_Prob_Bust'] + SWEEP_CI_FIELDS + SWEEP_SE_FIELDS:
+            if f in row:
+                row[f] = f"{row[f]:.6f}"
+        for f in ('ESS_Win', 'ESS_Bust'):
+            if f in row:
+                row[f] = f"{row[f]:.1f}"
+        if isinstance(row['Wins'], float):
+            # The exact engine's expected count
+            row['Wins'] = f"{row['Wins']:.6f}"
+        if 'Unreliable' in row:
+            row['Unreliable'] = int(row['Unreliable'])
+        yield row
+
+
+def export_csv(src_path, dst_path=None):
+    # .npz run log or sweep table -> the CSV the scripts write (default: same name, .csv)
+    if not is_columnar(src_path) or not os.path.exists(src_path):
+        raise ValueError(f"Not a columnar results file: {src_path}")
+    dst_path = dst_path or os.path.splitext(src_path)[0] + '.csv'
+    kind = columns_kind(src_path)
+    columns = read_columns(src_path)
+    if kind == 'run':
+        return write_results(run_rows(columns), os.path.dirname(dst_path) or '.', os.path.basename(dst_path), RUN_FIELDS)
+    if kind == 'sweep':
+        fields = sweep_fields(columns)
+        return write_results(sweep_rows(columns), os.path.dirname(dst_path) or '.', os.path.basename(dst_path), fields)
+    raise ValueError(f"{src_path} is not a run log or sweep table.")
@@ -5,69 +5,145 @@
 
 import os
 import sys
+import time
+from collections import deque
+from contextlib import nullcontext
 
 from game_engine import build_bet as bb
 from game_engine import roulette
+from strats import instrument
 from strats import io as strat_io
+from strats import strategies
 
 
 def _slugify_label(label):
     return ''.join(c for c in label if c.isalnum() or c in ('-', '_'))
 
 
-def run_martingale(initial_balance, buyout, bet_spec=None, outcomes=None, rng=None):
+def run_martingale(
+    initial_balance,
+    buyout,
+    bet_spec=None,
+    outcomes=None,
+    rng=None,
+    keep_rows=True,
+    sink=None,
+    timer=None,
+):
+    return run_strategy(
+        'martingale',
+        initial_balance,
+        buyout,
+        bet_spec=bet_spec,
+        outcomes=outcomes,
+        rng=rng,
+        keep_rows=keep_rows,
+        sink=sink,
+        timer=timer,
+    )
+
+
+def run_strategy(
+    strategy,
+    initial_balance,
+    buyout,
+    bet_spec=None,
+    outcomes=None,
+    rng=None,
+    keep_rows=True,
+    sink=None,
+    timer=None,
+):
+    # strategy: name or strats.strategies.Strategy; it only decides the next wager.
+    # keep_rows=False and no sink: summary only, nothing is allocated per round.
+    # sink: callable receiving each round's row dict as it is played.
+    # timer: optional strats.instrument.Recorder; adds per-phase seconds, runs and rounds.
+    clock = time.perf_counter if timer is not None else None
+    if clock:
+        mark = clock()
+    strategy = strategies.get_strategy(strategy)
     balance = initial_balance
     target_balance = initial_balance + buyout
-    current_wager = 1.0
+    state = strategy.start()
     round_count = 0
+    total_wagered = 0
     rows = []
+    bet = bb.compile_bet(bet_spec)
+    net_table = bet.net_table
+    emit_rows = keep_rows or sink is not None
+    if clock:
+        spin_time = payout_time = bookkeeping_time = 0.0
+        now = clock()
+        timer.add('bet', now - mark)
+        mark = now
 
-    max_rounds = len(outcomes) if outcomes else None
+    # outcomes: winning indices from strat_io.load_sequence (CSV-style row dicts also accepted)
+    if outcomes is not None and len(outcomes) and isinstance(outcomes[0], dict):
+        outcomes = [int(row['Winning Index']) for row in outcomes]
+    max_rounds = len(outcomes) if outcomes is not None and len(outcomes) else None
 
     while 0 < balance < target_balance and (max_rounds is None or round_count < max_rounds):
         round_count += 1
 
         # 1. Check if we can afford the current wager
+        current_wager = strategy.wager(state)
         all_in = False
         if current_wager > balance:
             current_wager = balance
             all_in = True
 
-        # 2. Construct the bet
-        bet_array, bet_label = bb.build_bet_from_spec(bet_spec, current_wager)
-
-        # 3. Get the winning index (From file or live RNG)
-        if outcomes and (round_count - 1) < len(outcomes):
-            row = outcomes[round_count - 1]
-            win_index = int(row['Winning Index'])
-            win_label = row['Winning Number']
-            color = row.get('Color') or roulette.num_to_color(win_label)
+        # 2. Get the winning index (From sequence or live RNG)
+        if clock:
+            now = clock()
+            bookkeeping_time += now - mark
+            mark = now
+        if max_rounds is not None:
+            win_index = int(outcomes[round_count - 1])
         else:
             win_index = roulette.spin(rng=rng)
-            win_label = roulette.index_to_num(win_index)
-            color = roulette.num_to_color(win_label)
+        if clock:
+            now = clock()
+            spin_time += now - mark
+            mark = now
 
-        # 4. Calculate Payout
-        net_result = roulette.payout(bet_array, win_index)
+        # 3. Calculate Payout (compiled bet: unit net for this index, scaled to the wager)
+        net_result = current_wager * net_table[win_index]
         balance += net_result
+        total_wagered += current_wager
+        if clock:
+            now = clock()
+            payout_time += now - mark
+            mark = now
 
-        # 5. Martingale Logic: Double on loss, reset on win
-        if net_result > 0:
-            current_wager = 1.0  # Reset
-        else:
-            current_wager *= 2  # Double down
-
-        rows.append({
-            'Round': round_count,
-            'Bet': bet_label,
-            'Winning Number': win_label,
-            'Color': color,
-            'Net': f"{net_result:+.2f}",
-            'Balance': f"{balance:.2f}",
-            '_net_raw': net_result,
-            '_all_in': all_in,
-            '_wager': current_wager,
-        })
+        # 4. Progression (Martingale: double on loss, reset on win)
+        state = strategy.update(state, current_wager, net_result > 0)
+
+        if emit_rows:
+            win_label = roulette.index_to_num(win_index)
+            row = {
+                'Round': round_count,
+                'Bet': bet.label,
+                'Winning Number': win_label,
+                'Color': roulette.num_to_color(win_label),
+                'Net': f"{net_result:+.2f}",
+                'Balance': f"{balance:.2f}",
+                '_net_raw': net_result,
+                '_balance_raw': balance,
+                '_win_index': win_index,
+                '_all_in': all_in,
+                '_wager': strategy.wager(state),
+            }
+            if keep_rows:
+                rows.append(row)
+            if sink is not None:
+                sink(row)
+
+    if clock:
+        timer.add('spin', spin_time)
+        timer.add('payout', payout_time)
+        timer.add('bookkeeping', bookkeeping_time + clock() - mark)
+        timer.count('runs')
+        timer.count('rounds', round_count)
 
     # Termination Summary
     if balance >= target_balance:
@@ -83,15 +159,88 @@ def run_martingale(initial_balance, buyout, bet_spec=None, outcomes=None, rng=No
         'outcome_label': outcome_label,
         'target_balance': target_balance,
         'final_balance': balance,
+        'total_wagered': total_wagered,
     }
 
 
+def _print_row(row):
+    if row.get('_all_in'):
+        balance_str = row['Balance']
+        wager_str = f"{row['_wager']:.2f}"
+        print(f"Can't afford wager of ${wager_str}. Going all-in with ${balance_str} - 🟡")
+    print(
+        f"Round {row['Round']}: Bet on {row['Bet']} | "
+        f"Landed on {row['Winning Number']} ({row['Color']}) | "
+        f"Net: ${row['Net']} | Balance: ${row['Balance']}"
+    )
+
+
+def _pop_output_flags(argv):
+    # --quiet: no per-round output, --tail K: only print the last K rounds, --format csv|npz: run log format,
+    # --out-dir DIR: where the run log goes (default strats/strat_data)
+    quiet = False
+    tail = None
+    fmt = 'csv'
+    out_dir = None
+    rest = []
+    args = iter(argv)
+    for arg in args:
+        if arg == '--quiet':
+            quiet = True
+        elif arg == '--tail':
+            tail = int(next(args, ''))
+        elif arg.startswith('--tail='):
+            tail = int(arg.split('=', 1)[1])
+        elif arg == '--format':
+            fmt = next(args, '')
+        elif arg.startswith('--format='):
+            fmt = arg.split('=', 1)[1]
+        elif arg == '--out-dir':
+            out_dir = next(args, '')
+        elif arg.startswith('--out-dir='):
+            out_dir = arg.split('=', 1)[1]
+        else:
+            rest.append(arg)
+    if tail is not None and tail < 0:
+        raise ValueError("--tail must be a non-negative number of rounds.")
+    if fmt not in ('csv', 'npz'):
+        raise ValueError("--format must be csv or npz.")
+    if out_dir == '':
+        raise ValueError("--out-dir needs a directory.")
+    return rest, quiet, tail, fmt, out_dir
+
+
+def _pop_instrument_flags(argv):
+    # --metrics PATH: phase timers and throughput as a JSON line, --profile [PATH]: cProfile dump
+    metrics_path = None
+    profile_path = None
+    rest = []
+    args = iter(argv)
+    for arg in args:
+        if arg == '--metrics':
+            metrics_path = next(args, '')
+        elif arg.startswith('--metrics='):
+            metrics_path = arg.split('=', 1)[1]
+        elif arg == '--profile':
+            profile_path = os.path.join(os.path.dirname(__file__), 'strat_data', 'martingale_profile.pstats')
+        elif arg.startswith('--profile='):
+            profile_path = arg.split('=', 1)[1]
+        else:
+            rest.append(arg)
+    if metrics_path == '':
+        raise ValueError("--metrics needs an output path.")
+    return rest, metrics_path, profile_path
+
+
 def main(argv=None):
     if argv is None:
         argv = sys.argv
 
     # Handle CLI arguments: python martingale.py <initial_balance> <buyout_profit> <optional_file> <optional_bet>
+    #                       [--quiet | --tail K] [--format csv|npz] [--out-dir DIR] [--metrics PATH] [--profile[=PATH]]
     try:
+        argv, quiet, tail, fmt, out_dir = _pop_output_flags(argv)
+        argv, metrics_path, profile_path = _pop_instrument_flags(argv)
         if len(argv) >= 3:
             init_bal = float(argv[1])
             buy_prof = float(argv[2])
@@ -121,20 +270,49 @@ def main(argv=None):
             if not bet_spec:
                 bet_spec = None
 
-        outcomes = strat_io.load_sequence(seq_file)
-        result = run_martingale(init_bal, buy_prof, bet_spec=bet_spec, outcomes=outcomes)
-
-        print(f"\nStarting Martingale: Balance ${init_bal}, Target ${result['target_balance']} - 🟢")
-        for row in result['rows']:
-            if row.get('_all_in'):
-                balance_str = row['Balance']
-                wager_str = f"{row['_wager']:.2f}"
-                print(f"Can't afford wager of ${wager_str}. Going all-in with ${balance_str} - 🟡")
-            print(
-                f"Round {row['Round']}: Bet on {row['Bet']} | "
-                f"Landed on {row['Winning Number']} ({row['Color']}) | "
-                f"Net: ${row['Net']} | Balance: ${row['Balance']}"
-            )
+        outcomes = strat_io.load_sequence_cached(seq_file)
+
+        bet_label_for_file = bb.compile_bet(bet_spec).label
+        n_str = int(init_bal)
+        m_str = int(buy_prof)
+        bet_slug = _slugify_label(bet_label_for_file)
+        filename = f"martingale_{n_str}n{m_str}m{bet_slug}.{fmt}"
+
+        out_dir = out_dir or os.path.join(os.path.dirname(__file__), 'strat_data')
+        fieldnames = strat_io.RUN_FIELDS
+
+        print(f"\nStarting Martingale: Balance ${init_bal}, Target ${init_bal + buy_prof} - 🟢")
+        # Rounds are streamed to the CSV as they are played; nothing is kept in memory
+        last_rows = deque(maxlen=tail) if tail is not None and not quiet else None
+        # npz keeps typed columns (exact floats) instead of formatted text; export_csv.py converts back
+        results_file = strat_io.stream_run_columns(out_dir, filename) if fmt == 'npz' \
+            else strat_io.stream_results(out_dir, filename, fieldnames)
+        with results_file as (path, write_row):
+            def _sink(row):
+                write_row(row)
+                if last_rows is not None:
+                    last_rows.append(row)
+                elif not quiet:
+                    _print_row(row)
+
+            timer = instrument.Recorder() if metrics_path else None
+            start = time.perf_counter()
+            with instrument.profiled(profile_path) if profile_path else nullcontext():
+                result = run_martingale(
+                    init_bal,
+                    buy_prof,
+                    bet_spec=bet_spec,
+                    outcomes=outcomes,
+                    keep_rows=False,
+                    sink=_sink,
+                    timer=timer,
+                )
+            elapsed = time.perf_counter() - start
+
+        if last_rows:
+            print(f"... last {len(last_rows)} of {result['round_count']} rounds:")
+            for row in last_rows:
+                _print_row(row)
 
         if result['outcome_label'] == "SUCCESS":
             print(f"{result['outcome_label']}: Hit buyout target in {result['round_count']} rounds! - 🔴")
@@ -143,16 +321,25 @@ def main(argv=None):
         else:
             print(f"{result['outcome_label']}: Bankroll hit zero in {result['round_count']} rounds. - 🔴")
 
-        bet_label_for_file = bb.build_bet_from_spec(bet_spec, 1.0)[1]
-        n_str = int(init_bal)
-        m_str = int(buy_prof)
-        bet_slug = _slugify_label(bet_label_for_file)
-        filename = f"martingale_{n_str}n{m_str}m{bet_slug}.csv"
-
-        out_dir = os.path.join(os.path.dirname(__file__), 'strat_data')
-        fieldnames = ['Round', 'Bet', 'Winning Number', 'Color', 'Net', 'Balance']
-        path = strat_io.write_results(result['rows'], out_dir, filename, fieldnames)
         print(f"\nSaved results to {path}")
+        if timer is not None:
+            # Bookkeeping includes writing each round to the CSV (and printing it unless --quiet)
+            log = instrument.MetricsLog(metrics_path)
+            log.emit(
+                'run',
+                initial_balance=init_bal,
+                buyout=buy_prof,
+                bet_spec=bet_spec,
+                outcome=result['outcome_label'],
+                seconds=round(elapsed, 6),
+                phases={k: round(v, 6) for k, v in timer.phases.items()},
+                **timer.counters,
+                **instrument.rates(timer.counters, elapsed),
+            )
+            log.close()
+            print(f"Phases: {instrument.format_phases(timer)}")
+            print(f"Metrics saved to {metrics_path}")
+        return result
     except (ValueError, TypeError) as e:
         print(f"Error: {e}")
 
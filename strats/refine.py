@@ -0,0 +1,45 @@
+# refine.py
+"""
+    Adaptive Grid Refinement for N / M sweeps.
+
+        input: a sweep range, results simulated so far (x -> (prob_win, expected_return))
+        output: the next x values worth simulating
+
+    Martingale curves are flat between the steps that bankrolls near powers of
+    two produce, so a uniform grid spends most of its points where nothing
+    changes. Refinement starts from a coarse grid and bisects the intervals
+    whose endpoints differ most in Prob_Win or (range-normalised)
+    Expected_Return, until intervals are min_gap wide or the point budget is spent.
+"""
+
+
+def coarse_grid(lo, hi, points):
+    # Evenly spaced integers over [lo, hi], both ends included
+    if hi < lo:
+        raise ValueError("sweep range is empty.")
+    points = max(2, points)
+    if hi - lo < points:
+        return list(range(lo, hi + 1))
+    return sorted({lo + round(i * (hi - lo) / (points - 1)) for i in range(points)})
+
+
+def interval_scores(results):
+    # [(score, width, a, b)] for neighbouring x values in results
+    xs = sorted(results)
+    exps = [results[x][1] for x in xs]
+    exp_range = (max(exps) - min(exps)) or 1.0
+    scores = []
+    for a, b in zip(xs, xs[1:]):
+        prob_change = abs(results[b][0] - results[a][0])
+        exp_change = abs(results[b][1] - results[a][1]) / exp_range
+        scores.append((max(prob_change, exp_change), b - a, a, b))
+    return scores
+
+
+def next_points(results, min_gap=1, limit=None):
+    # Midpoints of the steepest intervals still wider than min_gap; ties go to the wider interval
+    candidates = [s for s in interval_scores(results) if s[1] > max(1, min_gap)]
+    candidates.sort(key=lambda s: (s[0], s[1]), reverse=True)
+    if limit is not None:
+        candidates = candidates[:max(0, limit)]
+    return sorted((a + b) // 2 for _, _, a, b in candidates)
@@ -0,0 +1,77 @@
+# replay.py
+"""
+    Offset-Window Replay over a single loaded sequence.
+
+        input: sequence buffer (array of winning indices), replay mode, iterations
+        output: per-iteration start offsets and zero-copy windows into the buffer
+
+    Modes:
+        fixed     - every iteration replays from round 1 (identical runs)
+        strided   - iteration i starts at i * (len // iterations), wrapping around
+        random    - iteration i starts at a seeded uniform offset, wrapping around
+        bootstrap - iteration i replays seeded random blocks of block_size spins
+                    (at most MAX_BOOTSTRAP_BLOCKS blocks per iteration)
+"""
+
+import numpy as np
+
+REPLAY_MODES = ('fixed', 'strided', 'random', 'bootstrap')
+
+# Bootstrap windows stop after this many blocks so huge corpora don't need huge start tables
+MAX_BOOTSTRAP_BLOCKS = 1024
+
+
+def replay_starts(mode, sequence_length, iterations, seed=None, block_size=1000):
+    # Returns an (iterations, blocks) array of block start offsets; one block for every mode but bootstrap
+    if mode not in REPLAY_MODES:
+        raise ValueError(f"Unknown replay mode: {mode}")
+    if sequence_length <= 0:
+        raise ValueError("replay needs a non-empty sequence.")
+
+    if mode == 'fixed':
+        return np.zeros((iterations, 1), dtype=np.int64)
+    if mode == 'strided':
+        stride = max(1, sequence_length // max(1, iterations))
+        return ((np.arange(iterations, dtype=np.int64) * stride) % sequence_length)[:, None]
+
+    gen = np.random.default_rng(seed)
+    if mode == 'random':
+        return gen.integers(0, sequence_length, size=(iterations, 1), dtype=np.int64)
+
+    block_size = min(block_size, sequence_length)
+    if block_size <= 0:
+        raise ValueError("block_size must be positive.")
+    blocks = min(-(-sequence_length // block_size), MAX_BOOTSTRAP_BLOCKS)
+    return gen.integers(0, sequence_length - block_size + 1, size=(iterations, blocks), dtype=np.int64)
+
+
+class ReplayWindow:
+    """Read-only view of a sequence buffer starting at the given block offsets (no copy)."""
+
+    __slots__ = ('_buffer', '_starts', '_block_size', '_length')
+
+    def __init__(self, buffer, starts, block_size=None):
+        self._buffer = buffer
+        self._starts = starts
+        self._length = len(buffer)
+        # One start means a single circular window; several mean bootstrap blocks
+        self._block_size = block_size if len(starts) > 1 else None
+        if self._block_size is not None:
+            self._length = min(self._length, len(starts) * self._block_size)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, i):
+        if self._block_size is None:
+            return self._buffer[(self._starts[0] + i) % self._length]
+        block, pos = divmod(i, self._block_size)
+        return self._buffer[self._starts[block] + pos]
+
+
+def replay_window(buffer, starts, block_size=None):
+    if len(starts) == 1 and not starts[0]:
+        return buffer
+    if block_size is not None:
+        block_size = min(block_size, len(buffer))
+    return ReplayWindow(buffer, [int(s) for s in starts], block_size)
@@ -0,0 +1,128 @@
+# shard.py
+"""
+    Sharded Sweeps: split one sweep across processes or machines, then merge.
+
+        input: the sweep's grid points, per-point cost, iterations and a shard count
+        output: per shard, the (point, first iteration, iteration count) ranges it runs;
+                partial aggregates per shard and the merged per-point results
+
+    The plan lays every (point, iteration) end to end, weighted by the point's
+    cost, and cuts that line into equal parts, so it depends only on the sweep
+    parameters and every shard can compute it on its own. Iterations are cut
+    only where each one is reproducible on its own (seeded streams, replay);
+    otherwise whole points are assigned. Each shard writes the wins and
+    return sum of its ranges to a JSON file; merge() adds them up per point,
+    giving the same numbers as a single-node run.
+"""
+
+import json
+import os
+
+FORMAT = 1
+SHARD_DIR = 'assignment_data/shards'
+
+
+def parse_spec(spec):
+    # "2/4" -> (2, 4); shards are numbered from 1
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"--shard takes i/N (e.g. 2/4), got {spec!r}.")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"shard {spec} is out of range; use 1/N .. N/N.")
+    return index, count
+
+
+def plan(weights, iterations, shards, split_iterations=True):
+    # weights: integer per-iteration cost of each point. Returns shards lists of (point, first, count).
+    total = sum(weights) * iterations
+    parts = [[] for _ in range(shards)]
+    if total <= 0:
+        for p in range(len(weights)):
+            parts[p * shards // max(len(weights), 1)].append((p, 0, iterations))
+        return parts
+    # Shard k owns positions [ceil(k * total / shards), ceil((k + 1) * total / shards)) on the weighted line
+    starts = [-(-k * total // shards) for k in range(shards + 1)]
+    offset = 0
+    for p, weight in enumerate(weights):
+        span = weight * iterations
+        if not split_iterations or weight <= 0:
+            # Whole point to the shard that owns its midpoint
+            parts[min((2 * offset + span) * shards // (2 * total), shards - 1)].append((p, 0, iterations))
+        else:
+            for k in range(shards):
+                first = min(max(-(-(starts[k] - offset) // weight), 0), iterations)
+                last = min(max(-(-(starts[k + 1] - offset) // weight), 0), iterations)
+                if last > first:
+                    parts[k].append((p, first, last - first))
+        offset += span
+    return parts
+
+
+def shard_path(prefix, index, count, out_dir=SHARD_DIR):
+    return os.path.join(out_dir, f"{prefix}.shard{index}of{count}.json")
+
+
+def write_partial(path, index, count, params, points, parts):
+    # parts: [(point, first, count, result)], result as returned by the engine for that range
+    rows = []
+    for point, first, runs, result in parts:
+        # Return sums are whole units for every built-in bet; rounding drops the error from mean * count
+        rows.append([point, first, runs, result[0], round(result[2] * runs, 9), list(result)])
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump({'format': FORMAT, 'shard': [index, count], 'params': params, 'points': points, 'parts': rows}, f)
+    os.replace(tmp, path)
+    return path
+
+
+def load_partials(paths):
+    # Validated shard files -> (params, points, {point: [(first, count, wins, return_sum, result)]})
+    shards = []
+    for path in paths:
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('format') != FORMAT:
+            raise ValueError(f"{path} is not a version {FORMAT} shard file.")
+        shards.append((path, data))
+    if not shards:
+        raise ValueError("no shard files given.")
+    params, points = shards[0][1]['params'], shards[0][1]['points']
+    count = shards[0][1]['shard'][1]
+    seen = {}
+    for path, data in shards:
+        if data['params'] != params or data['points'] != points or data['shard'][1] != count:
+            raise ValueError(f"{path} belongs to a different sweep than {shards[0][0]}.")
+        if data['shard'][0] in seen:
+            raise ValueError(f"shard {data['shard'][0]}/{count} given twice ({seen[data['shard'][0]]}, {path}).")
+        seen[data['shard'][0]] = path
+    missing = sorted(set(range(1, count + 1)) - set(seen))
+    if missing:
+        raise ValueError(f"missing shard(s) {', '.join(f'{i}/{count}' for i in missing)}.")
+    by_point = {}
+    for _, data in shards:
+        for point, first, runs, wins, return_sum, result in data['parts']:
+            by_point.setdefault(point, []).append((first, runs, wins, return_sum, result))
+    return params, points, by_point
+
+
+def merge(by_point, point_count, iterations):
+    # Per-point results in point order; a point run whole keeps its result as is
+    results = []
+    for p in range(point_count):
+        ranges = sorted(by_point.get(p, []))
+        covered = 0
+        for first, runs, _, _, _ in ranges:
+            if first != covered:
+                raise ValueError(f"point {p}: iterations {covered}..{first - 1} are missing or overlap.")
+            covered += runs
+        if covered != iterations:
+            raise ValueError(f"point {p}: shards cover {covered} of {iterations} iterations.")
+        if len(ranges) == 1:
+            results.append(tuple(ranges[0][4]))
+            continue
+        wins = sum(r[2] for r in ranges)
+        return_sum = sum(r[3] for r in ranges)
+        results.append((wins, wins / iterations, return_sum / iterations))
+    return results
@@ -1,72 +1,82 @@
-import csv
-import os
+import argparse
+import sys
 from pathlib import Path
 import matplotlib.pyplot as plt
+import numpy as np
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root, for strats.chart_cache
+from strats import chart_cache
 
-def _read_runs(data_dir):
+# Figures are 12in wide at 150 dpi; more points than ~2 per pixel column can't be seen
+FIG_WIDTH, DPI = 12, 150
+MAX_BUCKETS = FIG_WIDTH * DPI
+
+
+def _read_runs(paths):
+    # Net/Balance arrays per run, parsed once and then loaded from .chart_cache/*.npz
     runs = []
-    # sorted() ensures the "last" file is consistent
-    for path in sorted(Path(data_dir).glob("martingale_*.csv")):
-        with path.open(newline="") as f:
-            reader = csv.DictReader(f)
-            rows = list(reader)
-        if not rows:
+    for path in paths:
+        cols = chart_cache.load_columns(path, ("Net", "Balance"))
+        if not len(cols["Net"]):
             continue
-        runs.append((path.stem, rows))
+        runs.append((path.stem, cols))
     return runs
 
 
-def _cumulative_win_rate(rows):
-    wins = 0
-    win_rates = []
-    rounds = []
-    for i, row in enumerate(rows, 1):
-        net = float(row["Net"])
-        if net > 0:
-            wins += 1
-        win_rates.append(wins / i)
-        rounds.append(i)
-    return rounds, win_rates
+def _downsample_minmax(x, y, buckets=MAX_BUCKETS):
+    # Peak-preserving downsampling: keep the first, min, max and last point of each
+    # bucket (in round order), so drawdown spikes survive at any zoom the PNG allows
+    n = len(y)
+    if n <= 4 * buckets:
+        return x, y
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    lo = np.minimum.reduceat(y, starts)
+    hi = np.maximum.reduceat(y, starts)
+    # Index of the min / max inside each bucket
+    bucket_of = np.repeat(np.arange(buckets), np.diff(edges))
+    lo_idx = np.flatnonzero(y == lo[bucket_of])
+    hi_idx = np.flatnonzero(y == hi[bucket_of])
+    # First match per bucket
+    lo_idx = lo_idx[np.unique(bucket_of[lo_idx], return_index=True)[1]]
+    hi_idx = hi_idx[np.unique(bucket_of[hi_idx], return_index=True)[1]]
+    keep = np.unique(np.concatenate([starts, edges[1:] - 1, lo_idx, hi_idx]))
+    return x[keep], y[keep]
 
 
-def _balance_curve(rows):
-    rounds = []
-    balances = []
-    for i, row in enumerate(rows, 1):
-        rounds.append(i)
-        balances.append(float(row["Balance"]))
-    return rounds, balances
+def _cumulative_win_rate(cols, buckets=MAX_BUCKETS):
+    rounds = np.arange(1, len(cols["Net"]) + 1)
+    win_rates = np.cumsum(cols["Net"] > 0) / rounds
+    return _downsample_minmax(rounds, win_rates, buckets)
 
 
-def main():
-    base_dir = Path(__file__).resolve().parent
-    charts_dir = base_dir / "charts"
-    charts_dir.mkdir(exist_ok=True)
+def _balance_curve(cols, buckets=MAX_BUCKETS):
+    rounds = np.arange(1, len(cols["Balance"]) + 1)
+    return _downsample_minmax(rounds, cols["Balance"], buckets)
 
-    runs = _read_runs(base_dir)
-    if not runs:
-        print("No martingale_*.csv files found in directory.")
-        return
 
-    num_runs = len(runs)
+# OFFSET SETTINGS
+# Probability offset: small since range is only 0 to 1
+PROB_OFFSET_STEP = 0.004
+# Balance offset: slightly larger to be visible against high bankrolls
+BAL_OFFSET_STEP = 0.0
+
 
-    # OFFSET SETTINGS
-    # Probability offset: small since range is only 0 to 1
-    prob_offset_step = 0.004
-    # Balance offset: slightly larger to be visible against high bankrolls
-    bal_offset_step = 0.0
+def _plot_win_probability(paths, out_path):
+    runs = _read_runs(paths)
+    num_runs = len(runs)
+    prob_offset_step = PROB_OFFSET_STEP
 
     # Chart 1: Cumulative win probability
-    plt.figure(figsize=(12, 7))
-    for i, (label, rows) in enumerate(runs):
+    plt.figure(figsize=(FIG_WIDTH, 7))
+    for i, (label, cols) in enumerate(runs):
         is_last = (i == num_runs - 1)
-        x, y = _cumulative_win_rate(rows)
+        x, y = _cumulative_win_rate(cols)
 
         # Apply Y-offset so lines don't perfectly overlap
-        offset_y = [val + (i * prob_offset_step) for val in y]
+        offset_y = y + (i * prob_offset_step)
 
-        n = len(rows)
+        n = len(cols["Net"])
         marker = "o" if n < 15 else None
 
         plt.plot(
@@ -87,21 +97,26 @@ def main():
     plt.ylim(0, 1.2)
     plt.legend(fontsize=8, loc='upper right', bbox_to_anchor=(1.15, 1))
     plt.grid(True, alpha=0.2)
-    win_path = charts_dir / "win_probability.png"
     plt.tight_layout()
-    plt.savefig(win_path, dpi=150)
+    plt.savefig(out_path, dpi=DPI)
     plt.close()
 
+
+def _plot_balance(paths, out_path):
+    runs = _read_runs(paths)
+    num_runs = len(runs)
+    bal_offset_step = BAL_OFFSET_STEP
+
     # Chart 2: Balance over time
-    plt.figure(figsize=(12, 7))
-    for i, (label, rows) in enumerate(runs):
+    plt.figure(figsize=(FIG_WIDTH, 7))
+    for i, (label, cols) in enumerate(runs):
         is_last = (i == num_runs - 1)
-        x, y = _balance_curve(rows)
+        x, y = _balance_curve(cols)
 
         # Apply Y-offset for balance
-        offset_y = [val + (i * bal_offset_step) for val in y]
+        offset_y = y + (i * bal_offset_step)
 
-        n = len(rows)
+        n = len(cols["Balance"])
         marker = "o" if n < 15 else None
 
         plt.plot(
@@ -121,14 +136,49 @@ def main():
     plt.ylabel("Balance ($ + small offset)")
     plt.legend(fontsize=8, loc='upper right', bbox_to_anchor=(1.15, 1))
     plt.grid(True, alpha=0.2)
-    bal_path = charts_dir / "balance.png"
     plt.tight_layout()
-    plt.savefig(bal_path, dpi=150)
+    plt.savefig(out_path, dpi=DPI)
     plt.close()
 
-    print(f"Analysis complete. Highlighted line: {runs[-1][0]}")
-    print(f"Saved: {win_path}\nSaved: {bal_path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Chart every martingale_*.csv / .npz run.")
+    parser.add_argument("--force", action="store_true")  # Redraw even if no run changed
+    parser.add_argument("--workers", type=int, default=None)  # Processes for rendering (default: one per chart)
+    args = parser.parse_args()
+
+    base_dir = Path(__file__).resolve().parent
+    charts_dir = base_dir / "charts"
+    charts_dir.mkdir(exist_ok=True)
+
+    # sorted() ensures the "last" file is consistent; a run saved as both .npz and .csv is read from the .npz
+    runs = {path.stem: path for path in base_dir.glob("martingale_*.csv")}
+    runs.update({path.stem: path for path in base_dir.glob("martingale_*.npz")})
+    paths = [runs[stem] for stem in sorted(runs)]
+    if not paths:
+        print("No martingale_*.csv or .npz files found in directory.")
+        return
+
+    # Parse (or refresh) every run's sidecar once here; the render workers then only load .npz files
+    _read_runs(paths)
+
+    win_path = charts_dir / "win_probability.png"
+    bal_path = charts_dir / "balance.png"
+    rendered, skipped = chart_cache.build(
+        [
+            (_plot_win_probability, win_path, paths, None, (paths, win_path)),
+            (_plot_balance, bal_path, paths, None, (paths, bal_path)),
+        ],
+        workers=args.workers,
+        force=args.force,
+    )
+
+    print(f"Analysis complete. Highlighted line: {paths[-1].stem}")
+    for path in rendered:
+        print(f"Saved: {path}")
+    for path in skipped:
+        print(f"Up to date: {path}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
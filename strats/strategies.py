@@ -0,0 +1,211 @@
+# strategies.py
+"""
+    Betting Progressions for American Roulette.
+
+        input: the progression state and the last round's stake / win
+        output: the next wager (in units of 1.0) and the updated state
+
+    Each strategy is a small state-update rule written twice: once on plain
+    Python values for the round-by-round engine (strats.martingale.run_strategy)
+    and once on NumPy arrays, one entry per session, for the lockstep engine
+    (strats.batch.run_strategy_batch). The engines own the round loop, the
+    all-in rule and the termination checks; a strategy only says how much to
+    bet next.
+
+    Scalar: start() -> state, wager(state) -> float, update(state, stake, won) -> state
+    Batch:  start_batch(k) -> state, wager_batch(state) -> array,
+            update_batch(state, stake, won) -> state, select_batch(state, keep) -> state
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+class Strategy(ABC):
+    """Base for progressions; a subclass missing any scalar or batch rule can't be instantiated."""
+
+    name = None
+
+    @abstractmethod
+    def start(self):
+        ...
+
+    @abstractmethod
+    def wager(self, state):
+        ...
+
+    @abstractmethod
+    def update(self, state, stake, won):
+        ...
+
+    @abstractmethod
+    def start_batch(self, sessions):
+        ...
+
+    @abstractmethod
+    def wager_batch(self, state):
+        ...
+
+    @abstractmethod
+    def update_batch(self, state, stake, won):
+        ...
+
+    def select_batch(self, state, keep):
+        return state[keep]
+
+
+''' MARTINGALE: double on loss, reset to 1 on win '''
+class Martingale(Strategy):
+    name = 'martingale'
+
+    # state: the next wager (doubles the stake actually placed, so an all-in loss doubles the all-in)
+    def start(self):
+        return 1.0
+
+    def wager(self, state):
+        return state
+
+    def update(self, state, stake, won):
+        return 1.0 if won else stake * 2
+
+    def start_batch(self, sessions):
+        return np.ones(sessions)
+
+    def wager_batch(self, state):
+        return state
+
+    def update_batch(self, state, stake, won):
+        return np.where(won, 1.0, stake * 2)
+
+
+''' FIBONACCI: one step up the sequence on loss, two steps back on win '''
+FIBONACCI = (1.0, 1.0)
+while len(FIBONACCI) < 1400:  # past ~1475 terms the values overflow a float
+    FIBONACCI += (FIBONACCI[-1] + FIBONACCI[-2],)
+_FIBONACCI_ARRAY = np.array(FIBONACCI)
+
+
+class Fibonacci(Strategy):
+    name = 'fibonacci'
+
+    # state: index into FIBONACCI
+    def start(self):
+        return 0
+
+    def wager(self, state):
+        return FIBONACCI[state]
+
+    def update(self, state, stake, won):
+        if won:
+            return max(state - 2, 0)
+        return min(state + 1, len(FIBONACCI) - 1)
+
+    def start_batch(self, sessions):
+        return np.zeros(sessions, dtype=np.int64)
+
+    def wager_batch(self, state):
+        return _FIBONACCI_ARRAY[state]
+
+    def update_batch(self, state, stake, won):
+        return np.where(won, np.maximum(state - 2, 0), np.minimum(state + 1, len(FIBONACCI) - 1))
+
+
+''' D'ALEMBERT: one unit up on loss, one unit down (never below 1) on win '''
+class DAlembert(Strategy):
+    name = 'dalembert'
+
+    # state: the next wager in units
+    def start(self):
+        return 1.0
+
+    def wager(self, state):
+        return state
+
+    def update(self, state, stake, won):
+        return max(state - 1.0, 1.0) if won else state + 1.0
+
+    def start_batch(self, sessions):
+        return np.ones(sessions)
+
+    def wager_batch(self, state):
+        return state
+
+    def update_batch(self, state, stake, won):
+        return np.where(won, np.maximum(state - 1.0, 1.0), state + 1.0)
+
+
+''' LABOUCHERE: bet first + last of the line; win crosses both off, loss appends the stake '''
+LABOUCHERE_LINE = (1.0, 2.0, 3.0, 4.0)
+
+
+class Labouchere(Strategy):
+    name = 'labouchere'
+
+    # state: the line as a tuple; an empty line starts over from LABOUCHERE_LINE
+    def start(self):
+        return LABOUCHERE_LINE
+
+    def wager(self, state):
+        return state[0] + state[-1] if len(state) > 1 else state[0]
+
+    def update(self, state, stake, won):
+        if won:
+            return state[1:-1] or LABOUCHERE_LINE
+        return state + (stake,)
+
+    # batch state: (line matrix, head, tail) with each session's line in line[i, head[i]:tail[i]]
+    def start_batch(self, sessions):
+        width = len(LABOUCHERE_LINE) * 4
+        line = np.zeros((sessions, width))
+        line[:, :len(LABOUCHERE_LINE)] = LABOUCHERE_LINE
+        head = np.zeros(sessions, dtype=np.int64)
+        tail = np.full(sessions, len(LABOUCHERE_LINE), dtype=np.int64)
+        return line, head, tail
+
+    def wager_batch(self, state):
+        line, head, tail = state
+        rows = np.arange(line.shape[0])
+        first = line[rows, head]
+        return np.where(tail - head > 1, first + line[rows, tail - 1], first)
+
+    def update_batch(self, state, stake, won):
+        line, head, tail = state
+        rows = np.arange(line.shape[0])
+        lost = ~won
+
+        # Win: cross off both ends (a one-number line just empties)
+        head = np.where(won, head + 1, head)
+        tail = np.where(won & (tail > head), tail - 1, tail)
+        empty = won & (tail <= head)
+        if empty.any():
+            line[empty, :len(LABOUCHERE_LINE)] = LABOUCHERE_LINE
+            head[empty] = 0
+            tail[empty] = len(LABOUCHERE_LINE)
+
+        # Loss: append the stake, widening the matrix when a line reaches the edge
+        if lost.any():
+            if tail[lost].max() >= line.shape[1]:
+                line = np.pad(line, ((0, 0), (0, line.shape[1])))
+            line[rows[lost], tail[lost]] = stake[lost]
+            tail = np.where(lost, tail + 1, tail)
+        return line, head, tail
+
+    def select_batch(self, state, keep):
+        line, head, tail = state
+        return line[keep], head[keep], tail[keep]
+
+
+STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (Martingale(), Fibonacci(), DAlembert(), Labouchere())
+}
+
+
+def get_strategy(strategy):
+    if isinstance(strategy, Strategy):
+        return strategy
+    name = (strategy or 'martingale').strip().lower()
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {name}")
+    return STRATEGIES[name]
@@ -0,0 +1,128 @@
+# variance.py
+"""
+    Variance-Reduced Estimates for sweeper grid points.
+
+        input: a grid point (N, buyout), iterations, bet, strategy, seed and the methods to use
+        output: Prob_Win / Expected_Return with their standard errors
+
+    Methods (any combination):
+
+        crn         common random numbers: iteration i draws from the (seed, iteration)
+                    stream at every grid point, so neighbouring points play the same
+                    spins and their difference isn't buried in independent noise
+        antithetic  iterations come in pairs; the second replays the first's stream
+                    with every spin mapped through a permutation that swaps the bet's
+                    winning slots with losing ones (a bijection of the 38 slots, so
+                    spins stay uniform) and the pair is negatively correlated
+        control     the house edge is known: every spin nets edge * wager on average,
+                    so return - edge * total wagered has mean 0 (Wald's identity) and
+                    serves as a control variate for both estimates, with its
+                    coefficient fitted per point
+
+    Standard errors come from the spread of the per-unit values (a unit is one
+    iteration, or one antithetic pair). Live RNG and the scalar engine only.
+"""
+
+import math
+
+import numpy as np
+
+from game_engine import build_bet as bb
+from game_engine import rng
+from strats.martingale import run_strategy
+
+METHODS = ('crn', 'antithetic', 'control')
+
+
+def house_edge(bet_spec):
+    # Expected net per unit wagered over one uniform spin (-2/38 for every even-money bet)
+    return sum(bb.compile_bet(bet_spec).net_table) / rng.WHEEL_SLOTS
+
+
+def antithetic_map(bet_spec):
+    # Slot permutation pairing the best-paying slots with the worst (an involution)
+    net_table = bb.compile_bet(bet_spec).net_table
+    order = sorted(range(rng.WHEEL_SLOTS), key=lambda index: (net_table[index], index))
+    mapping = [0] * rng.WHEEL_SLOTS
+    for k, index in enumerate(order):
+        mapping[index] = order[-1 - k]
+    return tuple(mapping)
+
+
+class Mirrored:
+    """A spin stream seen through a slot permutation; a drop-in for the rng in roulette.spin."""
+
+    __slots__ = ('_rng', '_mapping')
+
+    def __init__(self, spin_rng, mapping):
+        self._rng = spin_rng
+        self._mapping = mapping
+
+    def randint(self, a, b):
+        return self._mapping[self._rng.randint(a, b)]
+
+
+class EstimateStats:
+    """Per-iteration (won, return, wagered) of one grid point and the estimates they give."""
+
+    def __init__(self, edge, antithetic=False, control=False):
+        self.edge = edge
+        self.antithetic = antithetic
+        self.control = control
+        self.won = []
+        self.ret = []
+        self.wagered = []
+
+    def add(self, won, ret, wagered):
+        self.won.append(1.0 if won else 0.0)
+        self.ret.append(ret)
+        self.wagered.append(wagered)
+
+    @property
+    def count(self):
+        return len(self.won)
+
+    def _estimate(self, values, control):
+        # (mean, standard error) over the units, less the fitted multiple of the control
+        if self.control and len(values) > 2:
+            spread = float(np.var(control, ddof=1))
+            if spread > 0:
+                beta = float(np.cov(values, control)[0, 1]) / spread
+                values = values - beta * control
+        if len(values) < 2:
+            return (float(values.mean()) if len(values) else 0.0), math.inf
+        return float(values.mean()), float(values.std(ddof=1)) / math.sqrt(len(values))
+
+    def summary(self):
+        # (wins, prob_win, expected_return, iterations, se_prob, se_return)
+        won = np.asarray(self.won, dtype=float)
+        ret = np.asarray(self.ret, dtype=float)
+        control = ret - self.edge * np.asarray(self.wagered, dtype=float)
+        if self.antithetic:
+            # A pair is one sample; its two halves are not independent
+            won, ret, control = (x.reshape(-1, 2).mean(axis=1) for x in (won, ret, control))
+        prob, se_prob = self._estimate(won, control)
+        expected, se_return = self._estimate(ret, control)
+        return int(round(prob * self.count)), prob, expected, self.count, se_prob, se_return
+
+
+def simulate_point(n, m, iterations, methods, bet_spec='red', seed=None, strategy='martingale', first_iteration=0, timer=None):
+    # Returns (wins, prob_win, expected_return, iterations, se_prob, se_return) for iterations
+    # first_iteration.. of point (n, m); with antithetic both must be even (whole pairs)
+    antithetic = 'antithetic' in methods
+    if antithetic and (iterations % 2 or first_iteration % 2):
+        raise ValueError("antithetic estimates need an even number of iterations (whole pairs).")
+    stats = EstimateStats(house_edge(bet_spec), antithetic, 'control' in methods)
+    mapping = antithetic_map(bet_spec) if antithetic else None
+    # With crn every point shares the streams; otherwise each point keeps its own, as in sweeper.simulate_point
+    point = () if 'crn' in methods else (n, m)
+    for i in range(first_iteration, first_iteration + iterations):
+        if antithetic:
+            spin_rng = rng.stream(seed, point, i - i % 2)
+            if i % 2:
+                spin_rng = Mirrored(spin_rng, mapping)
+        else:
+            spin_rng = rng.stream(seed, point, i)
+        result = run_strategy(strategy, n, m, bet_spec=bet_spec, rng=spin_rng, keep_rows=False, timer=timer)
+        stats.add(result['outcome_label'] == 'SUCCESS', result['final_balance'] - n, result['total_wagered'])
+    return stats.summary()
@@ -1,32 +1,292 @@
 # temp.py
 import argparse
+import contextlib
 import csv
 import os
 import random
+import sys
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, replace
 
+import numpy as np
+
+from game_engine import rng
+from game_engine import roulette
+from strats import adaptive
+from strats import cache as result_cache
+from strats import checkpoint as checkpoints
+from strats import first_passage
+from strats import importance as importance_sampling
+from strats import instrument
 from strats import io as strat_io
-from strats.martingale import run_martingale
+from strats import refine
+from strats import replay
+from strats import shard as sharding
+from strats import variance as variance_reduction
+from strats.martingale import run_strategy
+from strats.strategies import STRATEGIES
+
+OUT_DIR = 'assignment_data'
+
 
+def simulate_point(
+    n,
+    m,
+    iterations,
+    bet_spec='red',
+    seed_base=None,
+    outcomes=None,
+    engine='scalar',
+    replay_starts=None,
+    block_size=None,
+    strategy='martingale',
+    first_iteration=0,
+    stats=None,
+    timer=None,
+):
+    # first_iteration: index of the first iteration to run (a cached point extended with more iterations)
+    # stats: optional adaptive.PointStats fed with each iteration's (won, return)
+    # timer: optional instrument.Recorder; only the scalar engine splits its time into phases
+    if timer is not None and _effective_engine(engine, outcomes, strategy) != 'scalar':
+        timer.count('runs', iterations)
+    # exact and events solve Martingale's closed form; other strategies use the scalar engine
+    if engine == 'exact' and outcomes is None and strategy == 'martingale':
+        result = _solve_exact(n, m, iterations, bet_spec)
+        if result is not None:
+            return result
+        # Unseeded exact sweeps are cached as deterministic, so the stand-in sample must be too
+        engine, seed_base = 'batch', 0 if seed_base is None else seed_base
+    if engine == 'batch' and outcomes is None:
+        from strats.batch import simulate_point_batch
+        # Lockstep draws depend on how many sessions run together, so the batch engine is
+        # reproducible per (seed, point, first iteration) rather than per iteration
+        seed = rng.generator(seed_base, (n, m), first_iteration) if seed_base is not None else None
+        return simulate_point_batch(n, m, iterations, bet_spec=bet_spec, seed=seed, strategy=strategy, stats=stats)
+    if engine == 'events' and outcomes is not None and strategy == 'martingale':
+        from strats.events import simulate_point_events
+        return simulate_point_events(
+            n,
+            m,
+            iterations,
+            outcomes,
+            bet_spec=bet_spec,
+            replay_starts=replay_starts,
+            block_size=block_size,
+            first_iteration=first_iteration,
+            stats=stats,
+        )
 
-def simulate_point(n, m, iterations, bet_spec='red', seed_base=None, outcomes=None):
     wins = 0
     total_return = 0.0
 
-    for i in range(iterations):
-        rng = None
+    for i in range(first_iteration, first_iteration + iterations):
+        spin_rng = None
+        sequence = outcomes
         if outcomes is None and seed_base is not None:
-            rng = random.Random(seed_base + i)
-        result = run_martingale(n, m, bet_spec=bet_spec, outcomes=outcomes, rng=rng)
-        if result['outcome_label'] == 'SUCCESS':
-            wins += 1
+            # Keyed by (seed, point, iteration): the same draws however points and iterations are split
+            spin_rng = roulette.get_rng(seed_base, stream=((n, m), i))
+        elif outcomes is not None and replay_starts is not None:
+            sequence = replay.replay_window(outcomes, replay_starts[i], block_size)
+        result = run_strategy(strategy, n, m, bet_spec=bet_spec, outcomes=sequence, rng=spin_rng, keep_rows=False, timer=timer)
+        won = result['outcome_label'] == 'SUCCESS'
+        wins += won
         total_return += (result['final_balance'] - n)
+        if stats is not None:
+            stats.add(won, result['final_balance'] - n)
 
     prob_win = wins / iterations if iterations else 0.0
     expected_return = total_return / iterations if iterations else 0.0
     return wins, prob_win, expected_return
 
 
+def _solve_exact(n, m, iterations, bet_spec):
+    # The exact engine's (wins, prob, exp), or None with a warning when the point's chain is too big to solve
+    from strats.exact import StateLimitError, simulate_point_exact
+    try:
+        return simulate_point_exact(n, m, iterations, bet_spec=bet_spec)
+    except StateLimitError as e:
+        print(f"Warning: N={n} M={m}: {e} Simulating it with the batch engine (seed 0 without --seed-base).", file=sys.stderr)
+        return None
+
+
+def simulate_point_adaptive(
+    n,
+    m,
+    max_iterations,
+    target_ci,
+    target_ci_return=None,
+    min_iterations=100,
+    chunk=100,
+    **point_kwargs,
+):
+    # Simulate in chunks until the 95% CIs are within target or max_iterations is spent.
+    # Returns (wins, prob_win, expected_return, iterations_used, ci_prob, ci_return).
+    if point_kwargs.get('engine') == 'exact' and point_kwargs.get('outcomes') is None \
+            and point_kwargs.get('strategy', 'martingale') == 'martingale':
+        result = _solve_exact(n, m, max_iterations, point_kwargs.get('bet_spec', 'red'))
+        if result is not None:
+            return result + (max_iterations, 0.0, 0.0)
+        point_kwargs = dict(point_kwargs, engine='batch')
+
+    stats = adaptive.PointStats()
+    while stats.count < max_iterations:
+        count = min(chunk, max_iterations - stats.count)
+        simulate_point(n, m, count, first_iteration=stats.count, stats=stats, **point_kwargs)
+        if stats.count >= min_iterations and stats.converged(target_ci, target_ci_return):
+            break
+    return stats.summary()
+
+
+_WORKER_OUTCOMES = None
+_WORKER_REPLAY = (None, None)
+_WORKER_ADAPTIVE = None
+_WORKER_INSTRUMENT = False
+_WORKER_VARIANCE = None
+_WORKER_IMPORTANCE = None
+
+
+def _init_worker(
+    sequence_path,
+    replay_starts=None,
+    block_size=None,
+    adaptive_opts=None,
+    instrumented=False,
+    variance=None,
+    importance=None,
+):
+    # Load the replay sequence once per worker; reseed so live-RNG workers don't share a stream
+    global _WORKER_OUTCOMES, _WORKER_REPLAY, _WORKER_ADAPTIVE, _WORKER_INSTRUMENT, _WORKER_VARIANCE, _WORKER_IMPORTANCE
+    _WORKER_OUTCOMES = strat_io.load_sequence(sequence_path) if sequence_path else None
+    _WORKER_REPLAY = (replay_starts, block_size)
+    _WORKER_ADAPTIVE = adaptive_opts
+    _WORKER_INSTRUMENT = instrumented
+    _WORKER_VARIANCE = variance
+    _WORKER_IMPORTANCE = importance
+    random.seed()
+
+
+def _run_task(
+    n,
+    m,
+    iterations,
+    bet_spec,
+    seed_base,
+    engine,
+    strategy,
+    first_iteration,
+    outcomes,
+    replay_starts,
+    block_size,
+    adaptive_opts,
+    instrumented=False,
+    variance=None,
+    importance=None,
+):
+    # instrumented: return (result, recorder snapshot with the point's seconds) instead of result
+    # variance: strats.variance methods; the result then carries iterations and standard errors
+    # importance: tilted per-spin win probability (strats.importance); adds Prob_Bust and ESS to the result
+    timer = instrument.Recorder() if instrumented else None
+    point_kwargs = {
+        'bet_spec': bet_spec,
+        'seed_base': seed_base,
+        'outcomes': outcomes,
+        'engine': engine,
+        'replay_starts': replay_starts,
+        'block_size': block_size,
+        'strategy': strategy,
+        'timer': timer,
+    }
+    start = time.perf_counter()
+    if importance is not None:
+        result = importance_sampling.simulate_point(
+            n, m, iterations, importance, bet_spec, seed_base, strategy, first_iteration=first_iteration, timer=timer
+        )
+    elif variance:
+        result = variance_reduction.simulate_point(
+            n, m, iterations, variance, bet_spec, seed_base, strategy, first_iteration=first_iteration, timer=timer
+        )
+    elif adaptive_opts:
+        result = simulate_point_adaptive(n, m, iterations, **adaptive_opts, **point_kwargs)
+    else:
+        result = simulate_point(n, m, iterations, first_iteration=first_iteration, **point_kwargs)
+    if timer is None:
+        return result
+    snapshot = timer.snapshot()
+    snapshot['seconds'] = time.perf_counter() - start
+    return result, snapshot
+
+
+def _simulate_worker_point(n, m, iterations, bet_spec, seed_base, engine, strategy, first_iteration=0):
+    return _run_task(
+        n,
+        m,
+        iterations,
+        bet_spec,
+        seed_base,
+        engine,
+        strategy,
+        first_iteration,
+        _WORKER_OUTCOMES,
+        _WORKER_REPLAY[0],
+        _WORKER_REPLAY[1],
+        _WORKER_ADAPTIVE,
+        _WORKER_INSTRUMENT,
+        _WORKER_VARIANCE,
+        _WORKER_IMPORTANCE,
+    )
+
+
+def _simulate_pooled_point(args, sequence_path, replay_starts, block_size, adaptive_opts, instrumented, variance=None, importance=None):
+    # For a pool shared between sweeps (serve.py): the sweep's settings travel with each
+    # task and the sequence comes from the worker's cache instead of the initializer
+    outcomes = strat_io.load_sequence_cached(sequence_path)
+    return _run_task(*args, outcomes, replay_starts, block_size, adaptive_opts, instrumented, variance, importance)
+
+
+def _run_targets(n, buyouts, iterations, bet_spec, seed_base, strategy, first_iteration, outcomes, replay_starts, block_size):
+    # First-passage task: (wins, return sums) per buyout plus the seconds it took
+    start = time.perf_counter()
+    wins, return_sums = first_passage.simulate_targets(
+        n,
+        buyouts,
+        iterations,
+        bet_spec=bet_spec,
+        seed_base=seed_base,
+        outcomes=outcomes,
+        replay_starts=replay_starts,
+        block_size=block_size,
+        strategy=strategy,
+        first_iteration=first_iteration,
+    )
+    return wins, return_sums, time.perf_counter() - start
+
+
+def _simulate_worker_targets(*args):
+    return _run_targets(*args, _WORKER_OUTCOMES, *_WORKER_REPLAY)
+
+
+def _simulate_pooled_targets(args, sequence_path, replay_starts, block_size):
+    return _run_targets(*args, strat_io.load_sequence_cached(sequence_path), replay_starts, block_size)
+
+
+def _effective_engine(engine, outcomes, strategy):
+    # The engine simulate_point actually dispatches to
+    if outcomes is None:
+        if engine == 'batch' or (engine == 'exact' and strategy == 'martingale'):
+            return engine
+        return 'scalar'
+    if engine == 'events' and strategy == 'martingale':
+        return engine
+    return 'scalar'
+
+
+def _point_weight(iterations, buyout):
+    # Relative cost of a point for the ETA: a Martingale run nets about one unit per win,
+    # so its rounds (and time) grow with the buyout, not just with iterations
+    return iterations * (max(buyout, 0) + 1)
+
+
 def _parse_values_list(values_arg):
     if not values_arg:
         return None
@@ -45,123 +305,773 @@ def _resolve_buyout(n, m_value, m_mode):
     return m_value
 
 
-def run_assignment(
-    n_min,
-    n_max,
-    n_step,
-    m_min,
-    m_max,
-    m_step,
-    iterations,
-    bet_spec,
-    seed_base,
-    sequence_path,
-    fixed_m,
-    fixed_n,
-    n_values,
-    m_values,
-    m_mode,
-    progress_every,
-):
-    os.makedirs('assignment_data', exist_ok=True)
-    outcomes = strat_io.load_sequence(sequence_path) if sequence_path else None
-    if outcomes and iterations > 1:
-        print("Note: sequence replay is deterministic; iterations > 1 will repeat identical runs.")
+@dataclass
+class SweepOptions:
+    """Every sweep parameter (the sweeper.py flags); run_assignment takes one of these."""
 
-    if n_values:
-        n_sweep = n_values
-    else:
-        if n_min == 1 and n_step > 1:
-            n_sweep = [1] + list(range(n_step, n_max + 1, n_step))
+    n_min: int = 1
+    n_max: int = 1000
+    n_step: int = 10
+    m_min: int = 1
+    m_max: int = 1000
+    m_step: int = 10
+    iterations: int = 5
+    bet_spec: str = 'red'
+    seed_base: int = None
+    sequence_path: str = None
+    fixed_m: int = 80
+    fixed_n: int = 256
+    n_values: list = None  # overrides n_min / n_max / n_step
+    m_values: list = None  # overrides m_min / m_max / m_step
+    m_mode: str = 'profit'
+    progress_every: int = 5
+    engine: str = 'scalar'
+    workers: int = 1
+    replay_mode: str = 'fixed'
+    block_size: int = 1000
+    strategy: str = 'martingale'
+    cache_path: str = None
+    cache_max_entries: int = result_cache.DEFAULT_MAX_ENTRIES
+    target_ci: float = None
+    target_ci_return: float = None
+    ci_min_iterations: int = 100
+    ci_chunk: int = 100
+    sweep_mode: str = 'uniform'
+    max_points: int = 100
+    min_gap: int = 1
+    coarse_points: int = 17
+    metrics_path: str = None
+    shard: tuple = None  # (i, N): run only shard i's part of the sweep and write its partial aggregates (see merge_shards)
+    checkpoint: bool = False  # record finished points in checkpoint_path (default <out_dir>/checkpoints/...)
+    checkpoint_path: str = None
+    resume: bool = False  # skip the points already in the checkpoint
+    output_format: str = 'csv'  # 'csv' or 'npz' (typed columns) for the fixed_M / fixed_N tables
+    grid: bool = False  # also write every N x M combination (first-passage mode, where a row of M values costs one pass)
+    variance: tuple = None  # strats.variance methods (crn, antithetic, control); adds standard-error columns
+    importance: float = None  # per-spin win probability to sample from (strats.importance); adds SE, Prob_Bust and ESS columns
+    # Where the tables, replay offsets, shard files and the default checkpoint go. The CLI's default cache is
+    # resolved against it before this, so server jobs with their own out_dir still share one cache.
+    out_dir: str = OUT_DIR
+
+
+def _check_options(opts):
+    # Reject combinations that can't run, before any work
+    estimator = '--variance-reduction' if opts.variance else '--importance-tilt' if opts.importance is not None else None
+    if opts.variance and opts.importance is not None:
+        raise ValueError("--variance-reduction and --importance-tilt are separate estimators; pick one.")
+    if estimator and (opts.shard is not None or opts.target_ci is not None or opts.sweep_mode == 'first-passage'):
+        raise ValueError(f"{estimator} can't be combined with --shard, --target-ci or --sweep-mode first-passage.")
+    if opts.variance and opts.sequence_path:
+        raise ValueError("--variance-reduction works on live RNG; sequence replay already plays the same spins at every point.")
+    if opts.importance is not None:
+        if opts.sequence_path:
+            raise ValueError("--importance-tilt draws its own spins; it can't replay a sequence.")
+        importance_sampling.tilted_wheel(opts.bet_spec, opts.importance)  # reject a bad tilt
+    if 'antithetic' in opts.variance and opts.iterations % 2:
+        raise ValueError("--variance-reduction antithetic runs iterations in pairs; give an even --iterations.")
+    if opts.shard is not None and opts.sweep_mode == 'adaptive':
+        raise ValueError("adaptive sweeps pick points from earlier results and can't be sharded.")
+    if opts.sweep_mode == 'first-passage' and (opts.shard is not None or opts.target_ci is not None):
+        raise ValueError("first-passage sweeps can't be combined with --shard or --target-ci.")
+    if opts.grid and opts.sweep_mode != 'first-passage':
+        raise ValueError("--grid needs --sweep-mode first-passage.")
+
+
+def _print_engine_notes(opts, outcomes):
+    if outcomes is not None and opts.engine in ('batch', 'exact'):
+        print(f"Note: {opts.engine} engine is live RNG only; sequence replay uses the scalar engine.")
+    if outcomes is None and opts.engine == 'events':
+        print("Note: events engine replays sequences only; live RNG uses the scalar engine.")
+    if opts.engine in ('exact', 'events') and opts.strategy != 'martingale':
+        print(f"Note: {opts.engine} engine is Martingale only; {opts.strategy} uses the scalar engine.")
+    elif opts.engine == 'exact' and outcomes is None:
+        print("Note: exact engine has no sampling noise; Wins is the expected count over iterations.")
+
+
+def _sweep_values(values, lo, hi, step):
+    # The explicit list, else lo..hi by step (starting 1, step, 2*step, ... when lo is 1)
+    if values:
+        return values
+    if lo == 1 and step > 1:
+        return [1] + list(range(step, hi + 1, step))
+    return list(range(lo, hi + 1, step))
+
+
+def _usable_cache_path(opts, outcomes, adaptive_opts, estimator):
+    # opts.cache_path, or None (with a note) when this sweep's points can't be cached
+    if not opts.cache_path:
+        return None
+    if adaptive_opts:
+        print("Note: --target-ci points are not cached; each point's sample size depends on its own results.")
+        return None
+    if opts.shard is not None:
+        # Cached samples always start at iteration 0, shard ranges may not
+        print("Note: the result cache is not used for sharded runs.")
+        return None
+    if opts.seed_base is None:
+        # Unseeded runs are fresh random draws; a cached entry would silently repeat an earlier one
+        deterministic = _effective_engine(opts.engine, outcomes, opts.strategy) == 'exact' if outcomes is None \
+            else opts.replay_mode in ('fixed', 'strided')
+        if not deterministic:
+            print("Note: the result cache is only used with --seed-base; unseeded runs are fresh random samples.")
+            return None
+    if opts.sweep_mode == 'first-passage':
+        print("Note: first-passage sweeps draw from their own streams and are not cached.")
+        return None
+    if estimator:
+        print(f"Note: {estimator} points are not cached; their standard errors need every iteration.")
+        return None
+    return opts.cache_path
+
+
+class Sweep:
+    """One sweep's resolved inputs and the state its passes share: pool, cache, checkpoint, progress, metrics."""
+
+    def __init__(self, opts, executor=None, on_point=None):
+        # executor: an already running process pool to simulate on (kept open afterwards)
+        # on_point: called with a dict for every finished point (cached ones included), from this thread
+        self.opts = opts
+        self.executor = executor
+        self.pool = executor
+        self.on_point = on_point
+        os.makedirs(opts.out_dir, exist_ok=True)
+        self.outcomes = outcomes = strat_io.load_sequence(opts.sequence_path) if opts.sequence_path else None
+        _print_engine_notes(opts, outcomes)
+        self.n_sweep = _sweep_values(opts.n_values, opts.n_min, opts.n_max, opts.n_step)
+        self.m_sweep = _sweep_values(opts.m_values, opts.m_min, opts.m_max, opts.m_step)
+
+        # --target-ci: iterations becomes the per-point budget and each point stops once its CI is tight
+        self.adaptive_opts = None
+        if opts.target_ci is not None:
+            self.adaptive_opts = {
+                'target_ci': opts.target_ci,
+                'target_ci_return': opts.target_ci_return,
+                'min_iterations': opts.ci_min_iterations,
+                'chunk': opts.ci_chunk,
+            }
+        estimator = '--variance-reduction' if opts.variance else '--importance-tilt' if opts.importance is not None else None
+        cache_path = _usable_cache_path(opts, outcomes, self.adaptive_opts, estimator)
+        if opts.sweep_mode == 'first-passage' and opts.engine != 'scalar':
+            print(f"Note: first-passage sweeps play sessions round by round; --engine {opts.engine} is not used.")
+        if estimator and opts.engine != 'scalar':
+            print(f"Note: {estimator} estimates use the scalar engine; --engine {opts.engine} is not used.")
+
+        # Everything that decides the output; checkpoints and shard files are only reused when it matches
+        has_digest = outcomes is not None and (cache_path or opts.checkpoint or opts.shard)
+        self.sequence_digest = result_cache.file_digest(opts.sequence_path) if has_digest else None
+        self.sweep_params = {
+            'n_sweep': self.n_sweep,
+            'm_sweep': self.m_sweep,
+            'fixed_m': opts.fixed_m,
+            'fixed_n': opts.fixed_n,
+            'm_mode': opts.m_mode,
+            'iterations': opts.iterations,
+            'bet_spec': opts.bet_spec,
+            'seed_base': opts.seed_base,
+            'sequence': self.sequence_digest,
+            'engine': opts.engine,
+            'replay_mode': opts.replay_mode if outcomes is not None else None,
+            'block_size': opts.block_size if outcomes is not None and opts.replay_mode != 'fixed' else None,
+            'strategy': opts.strategy,
+            'target_ci': self.adaptive_opts,
+            'sweep_mode': opts.sweep_mode,
+            'refine': [opts.max_points, opts.min_gap, opts.coarse_points] if opts.sweep_mode == 'adaptive' else None,
+            'variance': list(opts.variance) or None,
+            'importance': opts.importance,
+        }
+        suffix = _output_suffix(opts.iterations, opts.strategy, self.adaptive_opts, opts.sweep_mode, opts.variance, opts.importance)
+        self.output_prefix = f"fixed_M_{opts.fixed_m}_fixed_N_{opts.fixed_n}_{suffix}"
+
+        # Unseeded replay windows still get a seed, so a checkpoint can record it
+        replay_seed = opts.seed_base if opts.seed_base is not None else random.SystemRandom().randrange(2**63)
+        self.ckpt = None
+        if opts.checkpoint:
+            shard = opts.shard
+            name = self.output_prefix if shard is None else f"{self.output_prefix}.shard{shard[0]}of{shard[1]}"
+            self.ckpt = checkpoints.Checkpoint(
+                opts.checkpoint_path or checkpoints.checkpoint_path(name, os.path.join(opts.out_dir, 'checkpoints')),
+                dict(self.sweep_params, shard=list(shard) if shard else None),
+                {'replay_seed': replay_seed},
+                opts.resume,
+            )
+            replay_seed = self.ckpt.rng_state['replay_seed']
+        # Variance-reduced points draw from counter-based streams even unseeded (the recorded seed), so pairs and
+        # shared streams exist and a resumed sweep continues them
+        self.spin_seed = replay_seed if opts.variance else opts.seed_base
+        self.replay_starts = self._replay_starts(replay_seed)
+
+        # Reuse cached points; extend them when only extra iterations are missing
+        self.cache_conn = result_cache.open_cache(cache_path) if cache_path else None
+        self.effective = _effective_engine(opts.engine, outcomes, opts.strategy)
+        # Iteration i must depend only on (seed base, i) for a cached sample to be extended; the batch engine
+        # draws all its iterations from one generator seeded at the first, so its samples are kept whole
+        self.extendable = self.effective not in ('exact', 'batch') and (outcomes is None or opts.replay_mode == 'fixed')
+        self.cache_counts = [0, 0, 0]  # points requested, reused, extended
+
+        # Scenario 1 & 3: Fixed M (profit target), N from n_min to n_max
+        # Scenario 2 & 4: Fixed N, M (profit target) from m_min to m_max
+        self.uniform_points = [('fixed_M', n, opts.fixed_m) for n in self.n_sweep]
+        self.uniform_points += [('fixed_N', opts.fixed_n, m) for m in self.m_sweep]
+        self.progress = {
+            'done': 0,
+            'total': len(self.uniform_points) if opts.sweep_mode == 'uniform' else 2 * opts.max_points,
+            'start': time.time(),
+            'runs': 0,
+            'weight_queued': 0,
+            'weight_done': 0,
+        }
+
+        # --metrics: engine phase timers (summed over workers), sweep phases (wall clock) and JSON lines
+        self.instrumented = opts.metrics_path is not None
+        self.timer = instrument.Recorder() if self.instrumented else None
+        self.sweep_timer = instrument.Recorder() if self.instrumented else None
+        self.metrics = instrument.MetricsLog(opts.metrics_path) if self.instrumented else None
+        if self.metrics is not None:
+            self.metrics.emit(
+                'start',
+                engine=opts.engine,
+                strategy=opts.strategy,
+                bet_spec=opts.bet_spec,
+                iterations=opts.iterations,
+                workers=opts.workers,
+                sweep_mode=opts.sweep_mode,
+                points=len(self.uniform_points) if opts.sweep_mode == 'uniform' else None,
+            )
+
+    def _replay_starts(self, replay_seed):
+        # Window starts per iteration for strided / random / bootstrap replay, saved alongside the tables
+        opts, outcomes = self.opts, self.outcomes
+        if outcomes is not None and opts.replay_mode == 'fixed' and opts.iterations > 1:
+            print("Note: sequence replay is deterministic; iterations > 1 will repeat identical runs.")
+        if outcomes is None or opts.replay_mode == 'fixed':
+            return None
+        # Same windows for every grid point; recorded so the run can be reproduced or audited
+        starts = replay.replay_starts(opts.replay_mode, len(outcomes), opts.iterations, replay_seed, opts.block_size)
+        with open(os.path.join(opts.out_dir, f'replay_offsets_{opts.replay_mode}_{opts.iterations}.csv'), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Iteration', 'Starts'])
+            for i, window in enumerate(starts):
+                writer.writerow([i, ' '.join(str(int(s)) for s in window)])
+        return starts
+
+    def start_pool(self, tasks, adaptive_opts=None, instrumented=False, variance=None, importance=None):
+        # A private pool for tasks if the sweep has workers and none was given; the settings go to _init_worker
+        if self.pool is None and self.opts.workers > 1 and tasks > 1:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.opts.workers,
+                initializer=_init_worker,
+                initargs=(self.opts.sequence_path, self.replay_starts, self.opts.block_size, adaptive_opts, instrumented, variance, importance),
+            )
+        return self.pool
+
+    def report(self, n, m, buyout, runs, weight, snapshot=None):
+        # Progress line (every progress_every points) and the point's metrics line
+        progress = self.progress
+        progress['done'] += 1
+        progress['runs'] += runs
+        progress['weight_done'] += weight
+        point_index, total = progress['done'], progress['total']
+        elapsed = time.time() - progress['start']
+        # Remaining queued work at the pace seen so far, weighted by each point's buyout
+        eta = elapsed * (progress['weight_queued'] - progress['weight_done']) / max(progress['weight_done'], 1)
+        runs_per_sec = progress['runs'] / elapsed if elapsed > 0 else 0.0
+        progress['eta'] = eta
+        if self.metrics is not None:
+            # Per-point counters come from the engine (rounds only from the scalar engine)
+            self.metrics.emit(
+                'point',
+                done=point_index,
+                n=n,
+                m=m,
+                buyout=buyout,
+                iterations=runs,
+                seconds=round(snapshot['seconds'], 6),
+                **snapshot['counters'],
+                **instrument.rates(snapshot['counters'], snapshot['seconds']),
+                sweep_runs_per_sec=round(runs_per_sec, 1),
+                eta_seconds=round(eta, 1),
+            )
+        if point_index % self.opts.progress_every == 0 or point_index == total:
+            msg = f"[{point_index}/{total}] N={n} M={m} elapsed={elapsed:.1f}s {runs_per_sec:,.0f} runs/s ETA={eta:.0f}s"
+            print(msg, end="\r", flush=True)
+
+    def notify(self, n, m, result, runs, cached=False):
+        # on_point record for a finished point
+        opts = self.opts
+        record = {
+            'n': n,
+            'm': m,
+            'wins': result[0],
+            'iterations': result[3] if self.adaptive_opts else runs,
+            'prob_win': result[1],
+            'expected_return': result[2],
+            'cached': cached,
+            'done': self.progress['done'],
+            'total': self.progress['total'],
+            'elapsed': round(time.time() - self.progress['start'], 3),
+            'eta_seconds': round(self.progress.get('eta', 0.0), 1),
+        }
+        if opts.variance or opts.importance is not None:
+            record['se_prob_win'], record['se_expected_return'] = result[4], result[5]
+        if opts.importance is not None:
+            record.update(zip(('prob_bust', 'se_prob_bust', 'ess_win', 'ess_bust', 'unreliable'), result[6:11]))
+        self.on_point(record)
+
+    def _cache_lookup(self, batch, point_args, results):
+        # Fills results with cached points; returns (tasks for the rest, cache keys, cached partial samples)
+        opts = self.opts
+        cache_keys = [None] * len(batch)
+        cached_parts = [None] * len(batch)
+        resumed = {i for i, result in enumerate(results) if result is not None}
+        tasks = []
+        for i, args in enumerate(point_args):
+            if i in resumed:
+                continue
+            n, buyout = args[0], args[1]
+            cache_keys[i] = result_cache.point_key(
+                n=n,
+                buyout=buyout,
+                bet_spec=opts.bet_spec,
+                strategy=opts.strategy,
+                engine=self.effective,
+                seed_base=opts.seed_base,
+                sequence=self.sequence_digest,
+                replay_mode=opts.replay_mode if self.outcomes is not None else None,
+                block_size=opts.block_size if self.outcomes is not None and opts.replay_mode == 'bootstrap' else None,
+                iterations=None if self.extendable else opts.iterations,
+            )
+            hit = result_cache.lookup(self.cache_conn, cache_keys[i][0])
+            if hit is not None and hit[0] == opts.iterations:
+                results[i] = hit[1:]
+            elif hit is not None and hit[0] < opts.iterations and self.extendable:
+                cached_parts[i] = hit
+                tasks.append((i, (n, buyout, opts.iterations - hit[0]) + args[3:] + (hit[0],)))
+            else:
+                tasks.append((i, args + (0,)))
+        hits = [i for i, result in enumerate(results) if result is not None and i not in resumed]
+        self.cache_counts[0] += len(batch) - len(resumed)
+        self.cache_counts[1] += len(hits)
+        self.cache_counts[2] += sum(part is not None for part in cached_parts)
+        self.progress['done'] += len(hits)
+        for i in hits:
+            if self.ckpt is not None:
+                self.ckpt.add((batch[i][0], batch[i][1], 0, opts.iterations), results[i])
+            if self.on_point is not None:
+                self.notify(*batch[i], results[i], opts.iterations, cached=True)
+        return tasks, cache_keys, cached_parts
+
+    def _cache_store(self, result, key, cached_part):
+        # Stores a simulated point (merged with the cached part it extends); returns the point's full result
+        iters = self.opts.iterations - (cached_part[0] if cached_part else 0)
+        sample = (iters,) + tuple(result)
+        if cached_part:
+            sample = result_cache.merge(cached_part, sample)
+        result_cache.store(self.cache_conn, *key, *sample)
+        return sample[1:]
+
+    def evaluate(self, batch, ranges=None):
+        # Simulate a batch of (N, M) grid points; results come back in batch order.
+        # ranges: optional (first_iteration, count) per point instead of all iterations (a shard's slice)
+        opts = self.opts
+        ranges = ranges or [(0, opts.iterations)] * len(batch)
+        point_args = [
+            (n, _resolve_buyout(n, m, opts.m_mode), count, opts.bet_spec, self.spin_seed, opts.engine, opts.strategy)
+            for (n, m), (_, count) in zip(batch, ranges)
+        ]
+        results = [None] * len(batch)
+        weights = [_point_weight(args[2], args[1]) for args in point_args]
+        tasks = [(i, args + (first,)) for i, (args, (first, _)) in enumerate(zip(point_args, ranges))]
+        if self.ckpt is not None:
+            # Points finished before an interruption come straight from the checkpoint
+            for i, (n, m) in enumerate(batch):
+                results[i] = self.ckpt.get((n, m) + ranges[i])
+            tasks = [task for task in tasks if results[task[0]] is None]
+            self.progress['done'] += len(batch) - len(tasks)
+            if self.on_point is not None:
+                for i, result in enumerate(results):
+                    if result is not None:
+                        self.notify(*batch[i], result, ranges[i][1], cached=True)
+        cache_keys = cached_parts = None
+        if self.cache_conn is not None:
+            cache_start = time.perf_counter()
+            tasks, cache_keys, cached_parts = self._cache_lookup(batch, point_args, results)
+            if self.sweep_timer is not None:
+                self.sweep_timer.add('cache', time.perf_counter() - cache_start)
+        self.progress['weight_queued'] += sum(weights[i] for i, _ in tasks)
+
+        # Each point is seeded from seed_base alone, so results don't depend on which
+        # worker runs it or when it finishes; they are slotted back in batch order.
+        settings = (self.adaptive_opts, self.instrumented, opts.variance, opts.importance)
+        pool = self.start_pool(len(tasks), *settings)
+        simulate_start = time.perf_counter()
+        if pool is None:
+            finished = ((i, args, _run_task(*args, self.outcomes, self.replay_starts, opts.block_size, *settings)) for i, args in tasks)
         else:
-            n_sweep = list(range(n_min, n_max + 1, n_step))
+            if self.executor is not None:
+                futures = {
+                    pool.submit(_simulate_pooled_point, args, opts.sequence_path, self.replay_starts, opts.block_size, *settings): (i, args)
+                    for i, args in tasks
+                }
+            else:
+                futures = {pool.submit(_simulate_worker_point, *args): (i, args) for i, args in tasks}
+            finished = (futures[future] + (future.result(),) for future in as_completed(futures))
+        target = importance_sampling.target_event(opts.bet_spec, opts.importance) if opts.importance is not None else None
+        for i, args, result in finished:
+            snapshot = None
+            if self.instrumented:
+                result, snapshot = result
+                self.timer.merge(snapshot)
+            results[i] = result if self.cache_conn is None else self._cache_store(result, cache_keys[i], cached_parts[i])
+            if target is not None:
+                importance_sampling.warn_unreliable(*batch[i], results[i], target)
+            if self.ckpt is not None:
+                self.ckpt.add(batch[i] + ranges[i], results[i])
+            # Adaptive points report the samples they actually used
+            runs = result[3] if self.adaptive_opts else args[2]
+            self.report(*batch[i], args[1], runs, weights[i], snapshot)
+            if self.on_point is not None:
+                self.notify(*batch[i], results[i], ranges[i][1])
+        if self.sweep_timer is not None:
+            self.sweep_timer.add('simulate', time.perf_counter() - simulate_start)
+        return results
+
+    def close(self, failed=False):
+        # Release the checkpoint, a private pool and the cache; failed: log the abort to --metrics
+        if self.ckpt is not None:
+            self.ckpt.close()
+        if self.pool is not None and self.executor is None:
+            self.pool.shutdown()
+        if self.cache_conn is not None:
+            result_cache.evict(self.cache_conn, self.opts.cache_max_entries)
+            self.cache_conn.close()
+        if self.metrics is not None and failed:
+            self.metrics.emit('aborted', done=self.progress['done'], elapsed=round(time.time() - self.progress['start'], 3))
+            self.metrics.close()
+
+    def write_summary(self, points, write_start):
+        # The --metrics summary line and its printout
+        self.sweep_timer.add('write', time.perf_counter() - write_start)
+        elapsed = time.time() - self.progress['start']
+        counters = dict(self.timer.counters, points=len(points))
+        self.metrics.emit(
+            'summary',
+            elapsed=round(elapsed, 3),
+            phases={k: round(v, 6) for k, v in self.timer.phases.items()},
+            sweep_phases={k: round(v, 6) for k, v in self.sweep_timer.phases.items()},
+            counters=counters,
+            **instrument.rates(counters, elapsed),
+        )
+        self.metrics.close()
+        print(f"Engine phases: {instrument.format_phases(self.timer) or 'n/a (scalar engine only)'}")
+        print(f"Sweep phases: {instrument.format_phases(self.sweep_timer)}")
+        print("Throughput: " + ', '.join(f"{v:,.0f} {k.replace('_per_sec', '')}/s" for k, v in instrument.rates(counters, elapsed).items()))
+        print(f"Metrics saved to {self.opts.metrics_path}")
+
+
+''' SWEEP MODES: each returns ([(scenario, N, M)], results) '''
+def _sweep_uniform(sweep):
+    points = sweep.uniform_points
+    return points, sweep.evaluate([(n, m) for _, n, m in points])
+
+
+def _refine(sweep, lo, hi, grid_point):
+    # Coarse grid first, then bisect the steepest intervals until max_points or min_gap
+    opts = sweep.opts
+    # Bisect in batches of a few intervals per worker so the pool stays busy between rounds
+    refine_batch = max(4, 2 * opts.workers)
+    found = {}
+    xs = refine.coarse_grid(lo, hi, min(opts.coarse_points, opts.max_points))
+    while xs:
+        for x, result in zip(xs, sweep.evaluate([grid_point(x) for x in xs])):
+            found[x] = result
+        scores = {x: result[1:3] for x, result in found.items()}
+        xs = refine.next_points(scores, opts.min_gap, min(refine_batch, opts.max_points - len(found)))
+    return sorted(found.items())
+
+
+def _sweep_adaptive(sweep):
+    opts = sweep.opts
+    fixed_m_results = _refine(sweep, min(sweep.n_sweep), max(sweep.n_sweep), lambda n: (n, opts.fixed_m))
+    fixed_n_results = _refine(sweep, min(sweep.m_sweep), max(sweep.m_sweep), lambda m: (opts.fixed_n, m))
+    points = [('fixed_M', n, opts.fixed_m) for n, _ in fixed_m_results]
+    points += [('fixed_N', opts.fixed_n, m) for m, _ in fixed_n_results]
+    return points, [result for _, result in fixed_m_results + fixed_n_results]
+
+
+def _sweep_shard(sweep):
+    # Also returns the shard's plan: [(point index, first iteration, count)], one per result
+    opts = sweep.opts
+    points = sweep.uniform_points
+    # Iterations are cut only where each one is reproducible on its own
+    split = sweep.effective in ('scalar', 'events') and not sweep.adaptive_opts \
+        and (opts.seed_base is not None or (sweep.outcomes is not None and opts.replay_mode == 'fixed'))
+    if opts.seed_base is None and sweep.outcomes is None:
+        print("Note: without --seed-base each shard draws its own random runs; the merge is a valid sample but not reproducible.")
+    point_weights = [_point_weight(1, _resolve_buyout(n, m, opts.m_mode)) for _, n, m in points]
+    shard_plan = sharding.plan(point_weights, opts.iterations, opts.shard[1], split)[opts.shard[0] - 1]
+    sweep.progress['total'] = len(shard_plan)
+    results = sweep.evaluate(
+        [points[p][1:] for p, _, _ in shard_plan],
+        [(first, count) for _, first, count in shard_plan],
+    )
+    return points, results, shard_plan
 
-    if m_values:
-        m_sweep = m_values
+
+def _sweep_first_passage(sweep):
+    # Every N needs its own pass; the fixed-N row of M values (and, with --grid, every row) comes
+    # from one session per iteration instead of one per (M, iteration). Also returns the grid points and results.
+    opts = sweep.opts
+    passes = {}
+    for n in sweep.n_sweep:
+        passes.setdefault(n, set()).update([opts.fixed_m] + (sweep.m_sweep if opts.grid else []))
+    passes.setdefault(opts.fixed_n, set()).update(sweep.m_sweep)
+    found = _first_passage(sweep, {n: sorted(ms) for n, ms in passes.items()})
+    points = sweep.uniform_points
+    grid_points = [('grid', n, m) for n in sweep.n_sweep for m in sweep.m_sweep] if opts.grid else []
+    return points, [found[(n, m)] for _, n, m in points], grid_points, [found[(n, m)] for _, n, m in grid_points]
+
+
+def _finish_pass(sweep, found, n, ms, parts):
+    # All chunks of N are back: add them up in iteration order (whatever order they finished in)
+    iterations = sweep.opts.iterations
+    wins, return_sums = np.zeros(len(ms), dtype=np.int64), np.zeros(len(ms))
+    for k in sorted(parts):
+        wins, return_sums = wins + parts[k][0], return_sums + parts[k][1]
+    for m, w, r in zip(ms, wins.tolist(), return_sums.tolist()):
+        result = (w, w / iterations if iterations else 0.0, r / iterations if iterations else 0.0)
+        found[(n, m)] = result
+        if sweep.ckpt is not None:
+            sweep.ckpt.add((n, m, 0, iterations), result)
+
+
+def _first_passage(sweep, passes):
+    # passes: {N: [M values]}. One session per iteration at each N, played to its largest target,
+    # answers all of its M values. Returns {(N, M): (wins, prob_win, expected_return)}.
+    opts, ckpt = sweep.opts, sweep.ckpt
+    iterations = opts.iterations
+    found = {}
+    resumed = set()
+    tasks = []
+    # Split each pass into iteration chunks so a single pass (fixed N) still spreads over the workers
+    chunk = max(1, -(-iterations * len(passes) // (2 * opts.workers))) if opts.workers > 1 else iterations
+    for n, ms in passes.items():
+        done = [ckpt.get((n, m, 0, iterations)) if ckpt is not None else None for m in ms]
+        if all(result is not None for result in done):
+            found.update({(n, m): result for m, result in zip(ms, done)})
+            resumed.add(n)
+            continue
+        buyouts = tuple(_resolve_buyout(n, m, opts.m_mode) for m in ms)
+        for first in range(0, iterations, max(chunk, 1)):
+            tasks.append((n, buyouts, min(chunk, iterations - first), opts.bet_spec, opts.seed_base, opts.strategy, first))
+    sweep.progress['total'] = len(tasks)
+    weights = [_point_weight(args[2], max(args[1])) for args in tasks]
+    sweep.progress['weight_queued'] += sum(weights)
+
+    pool = sweep.start_pool(len(tasks))
+    simulate_start = time.perf_counter()
+    parts = {n: {} for n in passes}
+    pending = {}
+    for n, *_ in tasks:
+        pending[n] = pending.get(n, 0) + 1
+    if pool is None:
+        finished = ((k, _run_targets(*args, sweep.outcomes, sweep.replay_starts, opts.block_size)) for k, args in enumerate(tasks))
     else:
-        if m_min == 1 and m_step > 1:
-            m_sweep = [1] + list(range(m_step, m_max + 1, m_step))
+        if sweep.executor is not None:
+            futures = {
+                pool.submit(_simulate_pooled_targets, args, opts.sequence_path, sweep.replay_starts, opts.block_size): k
+                for k, args in enumerate(tasks)
+            }
         else:
-            m_sweep = list(range(m_min, m_max + 1, m_step))
-
-    # Scenario 1 & 3: Fixed M (profit target), N from n_min to n_max
-    results_n = []
-    total_points = len(n_sweep) + len(m_sweep)
-    point_index = 0
-    start_time = time.time()
-    for n in n_sweep:
-        point_index += 1
-        buyout = _resolve_buyout(n, fixed_m, m_mode)
-        wins, prob, exp = simulate_point(
-            n,
-            buyout,
-            iterations,
-            bet_spec=bet_spec,
-            seed_base=seed_base,
-            outcomes=outcomes,
-        )
-        results_n.append({
-            'N': n,
-            'M': fixed_m,
-            'Wins': wins,
-            'Iterations': iterations,
-            'Prob_Win': f"{prob:.6f}",
-            'Expected_Return': f"{exp:.6f}",
-        })
-        if point_index % progress_every == 0 or point_index == total_points:
-            elapsed = time.time() - start_time
-            msg = f"[{point_index}/{total_points}] N={n} M={fixed_m} elapsed={elapsed:.1f}s"
-            print(msg, end="\r", flush=True)
+            futures = {pool.submit(_simulate_worker_targets, *args): k for k, args in enumerate(tasks)}
+        finished = ((futures[future], future.result()) for future in as_completed(futures))
+    for k, (wins, return_sums, seconds) in finished:
+        n, buyouts, count = tasks[k][:3]
+        parts[n][k] = (wins, return_sums)
+        snapshot = {'seconds': seconds, 'counters': {'runs': count}} if sweep.instrumented else None
+        if snapshot is not None:
+            sweep.timer.merge(snapshot)
+        sweep.report(n, max(passes[n]), max(buyouts), count, weights[k], snapshot)
+        pending[n] -= 1
+        if not pending[n]:
+            _finish_pass(sweep, found, n, passes[n], parts[n])
+    for n in passes:
+        if n not in resumed and n not in pending:
+            _finish_pass(sweep, found, n, passes[n], {})  # no iterations to run
+    if sweep.sweep_timer is not None:
+        sweep.sweep_timer.add('simulate', time.perf_counter() - simulate_start)
+    if sweep.on_point is not None:
+        for done, ((n, m), result) in enumerate(sorted(found.items()), 1):
+            sweep.on_point({
+                'n': n,
+                'm': m,
+                'wins': result[0],
+                'iterations': iterations,
+                'prob_win': result[1],
+                'expected_return': result[2],
+                'cached': False,
+                'done': done,
+                'total': len(found),
+                'elapsed': round(time.time() - sweep.progress['start'], 3),
+                'eta_seconds': 0.0,
+            })
+    return found
 
-    # Scenario 2 & 4: Fixed N, M (profit target) from m_min to m_max
-    results_m = []
-    for m in m_sweep:
-        point_index += 1
-        buyout = _resolve_buyout(fixed_n, m, m_mode)
-        wins, prob, exp = simulate_point(
-            fixed_n,
-            buyout,
-            iterations,
-            bet_spec=bet_spec,
-            seed_base=seed_base,
-            outcomes=outcomes,
-        )
-        results_m.append({
-            'N': fixed_n,
-            'M': m,
-            'Wins': wins,
-            'Iterations': iterations,
-            'Prob_Win': f"{prob:.6f}",
-            'Expected_Return': f"{exp:.6f}",
-        })
-        if point_index % progress_every == 0 or point_index == total_points:
-            elapsed = time.time() - start_time
-            msg = f"[{point_index}/{total_points}] N={fixed_n} M={m} elapsed={elapsed:.1f}s"
-            print(msg, end="\r", flush=True)
 
-    suffix = iterations
-    with open(f'assignment_data/fixed_M_{fixed_m}_{suffix}.csv', 'w', newline='') as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=['N', 'M', 'Wins', 'Iterations', 'Prob_Win', 'Expected_Return'],
-        )
-        writer.writeheader()
-        writer.writerows(results_n)
+def run_assignment(options, executor=None, on_point=None):
+    # Run the sweep options describe and write its tables (or shard file); returns the output paths.
+    # executor: an already running process pool to simulate on (kept open afterwards)
+    # on_point: called with a dict for every finished point (cached ones included), from this thread
+    opts = replace(options, variance=tuple(method for method in variance_reduction.METHODS if method in (options.variance or ())))
+    _check_options(opts)
+    sweep = Sweep(opts, executor, on_point)
+    grid_points = grid_results = shard_plan = None
+    try:
+        if opts.sweep_mode == 'first-passage':
+            points, results, grid_points, grid_results = _sweep_first_passage(sweep)
+        elif opts.sweep_mode == 'adaptive':
+            points, results = _sweep_adaptive(sweep)
+        elif opts.shard is not None:
+            points, results, shard_plan = _sweep_shard(sweep)
+        else:
+            points, results = _sweep_uniform(sweep)
+    finally:
+        sweep.close(failed=sys.exc_info()[0] is not None)
+
+    print()
+    if sweep.cache_conn is not None:
+        counts = sweep.cache_counts
+        print(f"Cache: {counts[1]} of {counts[0]} points reused, {counts[2]} extended with extra iterations.")
 
-    with open(f'assignment_data/fixed_N_{fixed_n}_{suffix}.csv', 'w', newline='') as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=['N', 'M', 'Wins', 'Iterations', 'Prob_Win', 'Expected_Return'],
+    write_start = time.perf_counter()
+    if shard_plan is not None:
+        path = sharding.write_partial(
+            sharding.shard_path(sweep.output_prefix, *opts.shard, os.path.join(opts.out_dir, 'shards')),
+            *opts.shard,
+            sweep.sweep_params,
+            [list(point) for point in points],
+            [(p, first, count, result) for (p, first, count), result in zip(shard_plan, results)],
+        )
+        outputs = (path,)
+        print(f"Shard {opts.shard[0]}/{opts.shard[1]}: {len(shard_plan)} point ranges saved to {path}")
+    else:
+        outputs = write_outputs(
+            points,
+            results,
+            opts.iterations,
+            opts.fixed_m,
+            opts.fixed_n,
+            opts.strategy,
+            sweep.adaptive_opts,
+            opts.sweep_mode,
+            opts.output_format,
+            opts.variance,
+            opts.importance,
+            opts.out_dir,
         )
-        writer.writeheader()
-        writer.writerows(results_m)
+        if grid_points:
+            outputs += (write_grid(grid_points, grid_results, opts.iterations, opts.strategy, opts.sweep_mode, opts.output_format, opts.out_dir),)
+    if sweep.ckpt is not None:
+        sweep.ckpt.discard()
+    if sweep.metrics is not None:
+        sweep.write_summary(points, write_start)
+    return outputs
 
-    print()
-    print("Assignment data saved to /assignment_data")
 
+def _output_suffix(iterations, strategy, adaptive_opts=None, sweep_mode='uniform', variance=None, importance=None):
+    # Martingale keeps the original file names; other strategies are tagged so they don't overwrite them
+    suffix = iterations if strategy == 'martingale' else f"{iterations}_{strategy}"
+    if adaptive_opts:
+        suffix = f"{suffix}_ci"
+    if variance:
+        suffix = f"{suffix}_{'_'.join(variance)}"
+    if importance is not None:
+        suffix = f"{suffix}_tilt{importance:g}"
+    if sweep_mode != 'uniform':
+        suffix = f"{suffix}_{sweep_mode.replace('-', '_')}"
+    return suffix
+
+
+def write_outputs(
+    points,
+    results,
+    iterations,
+    fixed_m,
+    fixed_n,
+    strategy,
+    adaptive_opts=None,
+    sweep_mode='uniform',
+    fmt='csv',
+    variance=None,
+    importance=None,
+    out_dir=OUT_DIR,
+):
+    # The fixed_M / fixed_N table pair for [(scenario, N, M)] and their results; returns both paths.
+    # fmt: 'csv' (formatted text) or 'npz' (typed columns, see strats.io)
+    tables = {'fixed_M': [], 'fixed_N': []}
+    for (scenario, n, m), result in zip(points, results):
+        # Adaptive points report the samples actually used and the 95% CI half-widths reached,
+        # variance-reduced points their standard errors, importance-sampled points also Prob_Bust, ESS and
+        # whether the estimate is flagged as unreliable
+        used = result[3] if adaptive_opts else iterations
+        extra = tuple(result[4:6]) if adaptive_opts or variance else ()
+        extra = tuple(result[4:11]) if importance is not None else extra
+        tables[scenario].append((n, m, result[0], used, result[1], result[2]) + extra)
+
+    fields = strat_io.SWEEP_FIELDS + (strat_io.SWEEP_CI_FIELDS if adaptive_opts else [])
+    fields += strat_io.SWEEP_SE_FIELDS if variance or importance is not None else []
+    fields += strat_io.SWEEP_IS_FIELDS if importance is not None else []
+    suffix = _output_suffix(iterations, strategy, adaptive_opts, sweep_mode, variance, importance)
+    ext = strat_io.COLUMNAR_SUFFIX if fmt == 'npz' else '.csv'
+    paths = (os.path.join(out_dir, f'fixed_M_{fixed_m}_{suffix}{ext}'), os.path.join(out_dir, f'fixed_N_{fixed_n}_{suffix}{ext}'))
+    for path, rows in zip(paths, (tables['fixed_M'], tables['fixed_N'])):
+        _write_table(path, rows, fields, fmt)
+
+    print(f"Assignment data saved to {out_dir}")
+    return paths
+
+
+def write_grid(points, results, iterations, strategy, sweep_mode='first-passage', fmt='csv', out_dir=OUT_DIR):
+    # Every (N, M) combination as one table, rows ordered by N then M; returns its path
+    rows = [(n, m, result[0], iterations, result[1], result[2]) for (_, n, m), result in zip(points, results)]
+    ext = strat_io.COLUMNAR_SUFFIX if fmt == 'npz' else '.csv'
+    path = os.path.join(out_dir, f'grid_{_output_suffix(iterations, strategy, None, sweep_mode)}{ext}')
+    _write_table(path, rows, strat_io.SWEEP_FIELDS, fmt)
+    print(f"Grid of {len(rows)} (N, M) points saved to {path}")
+    return path
+
+
+def _write_table(path, rows, fields, fmt):
+    columns = {}
+    for i, field in enumerate(fields):
+        # Wins is a float column when an engine reports expected counts (exact), otherwise integer
+        dtype = float if i >= 4 else None
+        columns[field] = np.array([row[i] for row in rows], dtype=dtype)
+    if fmt == 'npz':
+        strat_io.write_columns(path, 'sweep', columns)
+    else:
+        strat_io.write_results(strat_io.sweep_rows(columns), os.path.dirname(path), os.path.basename(path), fields)
+
+
+def merge_shards(paths, output_format='csv', out_dir=OUT_DIR):
+    # Combine every shard's partial file into the CSVs a single-node run writes
+    params, points, by_point = sharding.load_partials(paths)
+    results = sharding.merge(by_point, len(points), params['iterations'])
+    os.makedirs(out_dir, exist_ok=True)
+    return write_outputs(
+        [tuple(point) for point in points],
+        results,
+        params['iterations'],
+        params['fixed_m'],
+        params['fixed_n'],
+        params['strategy'],
+        params['target_ci'],
+        fmt=output_format,
+        out_dir=out_dir,
+    )
 
-def parse_args():
-    parser = argparse.ArgumentParser(description="Generate assignment data for martingale strategy.")  # CLI config
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate assignment data for a betting strategy.")  # CLI config
     parser.add_argument('--n-min', type=int, default=1)  # N sweep start (initial bankroll)
     parser.add_argument('--n-max', type=int, default=1000)  # N sweep end (initial bankroll)
     parser.add_argument('--n-step', type=int, default=10)  # N sweep increment
@@ -183,12 +1093,73 @@ def parse_args():
         choices=['profit', 'target_balance'],
     )  # Interpret M as profit or target balance
     parser.add_argument('--progress-every', type=int, default=5)  # Progress print interval
-    return parser.parse_args()
+    parser.add_argument(
+        '--engine',
+        type=str,
+        default='scalar',
+        choices=['scalar', 'batch', 'exact', 'events'],
+    )  # scalar: one run_martingale per iteration, batch: all iterations in lockstep (NumPy), exact: Markov-chain solve,
+    # events: sequence replay that jumps whole loss streaks
+    parser.add_argument('--workers', type=int, default=1)  # Worker processes for grid points (1 = serial)
+    parser.add_argument(
+        '--replay-mode',
+        type=str,
+        default='fixed',
+        choices=list(replay.REPLAY_MODES),
+    )  # Where each iteration starts in --sequence-path (strided/random offsets, block bootstrap)
+    parser.add_argument('--block-size', type=int, default=1000)  # Spins per block for --replay-mode bootstrap
+    parser.add_argument('--cache-path', type=str, default=None)  # SQLite result cache (default: <out dir>/sweep_cache.sqlite)
+    parser.add_argument('--no-cache', action='store_true')  # Always simulate every point
+    parser.add_argument(
+        '--cache-max-entries',
+        type=int,
+        default=result_cache.DEFAULT_MAX_ENTRIES,
+    )  # Least recently used points beyond this are evicted
+    parser.add_argument('--target-ci', type=float, default=None)  # Stop a point once the 95% CI half-width of Prob_Win is this small (--iterations = max budget)
+    parser.add_argument('--target-ci-return', type=float, default=None)  # Also require this 95% CI half-width on Expected_Return
+    parser.add_argument('--ci-min-iterations', type=int, default=100)  # Samples before a point may stop
+    parser.add_argument('--ci-chunk', type=int, default=100)  # Iterations simulated between convergence checks
+    parser.add_argument(
+        '--strategy',
+        type=str,
+        default='martingale',
+        choices=list(STRATEGIES),
+    )  # Betting progression (strats/strategies.py)
+    parser.add_argument(
+        '--sweep-mode',
+        type=str,
+        default='uniform',
+        choices=['uniform', 'adaptive', 'first-passage'],
+    )  # adaptive: coarse grid over the sweep range, then bisect where Prob_Win / Expected_Return change most,
+    # first-passage: one session per iteration and N answers every M (strats/first_passage.py)
+    parser.add_argument('--grid', action='store_true')  # first-passage: also write the full N x M table (assignment_data/grid_*.csv)
+    parser.add_argument('--max-points', type=int, default=100)  # Adaptive point budget per sweep (fixed M and fixed N each)
+    parser.add_argument('--min-gap', type=int, default=1)  # Adaptive resolution: intervals this narrow are not bisected
+    parser.add_argument('--coarse-points', type=int, default=17)  # Adaptive starting grid size
+    parser.add_argument('--metrics', type=str, default=None)  # JSON lines: per-point timings/throughput/ETA and a phase summary
+    parser.add_argument('--profile', type=str, nargs='?', const='assignment_data/sweep_profile.pstats', default=None)  # cProfile the run (main process) to this pstats file
+    parser.add_argument('--shard', type=str, default=None)  # i/N: run only shard i of N and save its partial results to assignment_data/shards
+    parser.add_argument('--merge', type=str, nargs='+', default=None)  # Shard files to combine into the final CSVs (no simulation)
+    parser.add_argument('--out-dir', type=str, default=OUT_DIR)  # Directory for the output tables, replay offsets, shard files and checkpoints
+    parser.add_argument('--format', type=str, default='csv', choices=['csv', 'npz'])  # Output tables: csv, or npz typed columns (export with export_csv.py)
+    parser.add_argument('--checkpoint', type=str, default=None)  # Checkpoint file (default: assignment_data/checkpoints/<outputs>.ckpt.jsonl)
+    parser.add_argument('--no-checkpoint', action='store_true')  # Don't record finished points as they complete
+    parser.add_argument('--resume', action='store_true')  # Skip the points already in the checkpoint of an interrupted run
+    parser.add_argument(
+        '--variance-reduction',
+        type=str,
+        nargs='+',
+        default=None,
+        choices=list(variance_reduction.METHODS),
+    )  # crn: same spin streams at every point, antithetic: mirrored iteration pairs, control: house-edge control variate;
+    # adds SE_Prob_Win / SE_Expected_Return columns (strats/variance.py)
+    parser.add_argument('--importance-tilt', type=float, default=None)  # Sample spins with this per-spin win probability and reweight each run (strats/importance.py): above the bet's odds for rare successes, below for rare busts
+    return parser.parse_args(argv)
 
 
-if __name__ == "__main__":
-    args = parse_args()
-    run_assignment(
+def assignment_options(args):
+    # SweepOptions from parsed CLI args
+    return SweepOptions(
         n_min=args.n_min,
         n_max=args.n_max,
         n_step=args.n_step,
@@ -205,4 +1176,43 @@ if __name__ == "__main__":
         m_values=_parse_values_list(args.m_values),
         m_mode=args.m_mode,
         progress_every=max(1, args.progress_every),
+        engine=args.engine,
+        workers=max(1, args.workers),
+        replay_mode=args.replay_mode,
+        block_size=max(1, args.block_size),
+        strategy=args.strategy,
+        cache_path=None if args.no_cache else args.cache_path or os.path.join(args.out_dir, result_cache.DEFAULT_NAME),
+        cache_max_entries=args.cache_max_entries,
+        target_ci=args.target_ci,
+        target_ci_return=args.target_ci_return,
+        ci_min_iterations=max(2, args.ci_min_iterations),
+        ci_chunk=max(1, args.ci_chunk),
+        sweep_mode=args.sweep_mode,
+        max_points=max(2, args.max_points),
+        min_gap=max(1, args.min_gap),
+        coarse_points=max(2, args.coarse_points),
+        metrics_path=args.metrics,
+        shard=sharding.parse_spec(args.shard) if args.shard else None,
+        checkpoint=not args.no_checkpoint,
+        checkpoint_path=args.checkpoint,
+        resume=args.resume,
+        output_format=args.format,
+        grid=args.grid,
+        variance=args.variance_reduction,
+        importance=args.importance_tilt,
+        out_dir=args.out_dir,
     )
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    # --profile only sees the main process; use --workers 1 to profile the engines themselves
+    try:
+        if args.merge:
+            merge_shards(args.merge, args.format, args.out_dir)
+        else:
+            with instrument.profiled(args.profile) if args.profile else contextlib.nullcontext():
+                run_assignment(assignment_options(args))
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(2)
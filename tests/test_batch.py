@@ -0,0 +1,45 @@
+# test_batch.py
+"""The batch (lockstep NumPy) engine against the scalar engine and the exact solve (strats.batch)."""
+
+import math
+
+import pytest
+
+import sweeper
+from strats.exact import solve_martingale
+
+ITERATIONS = 3000
+SEED = 7
+
+
+def _z(a, b, iterations):
+    # Difference of two independent Prob_Win estimates in standard errors
+    p = (a + b) / 2
+    se = math.sqrt(max(p * (1 - p), 1e-12) * 2 / iterations)
+    return abs(a - b) / se
+
+
+@pytest.mark.parametrize('strategy', ['martingale', 'fibonacci', 'dalembert', 'labouchere'])
+@pytest.mark.parametrize('n, m', [(16, 20), (100, 40)])
+def test_batch_agrees_with_scalar(strategy, n, m):
+    # Different draws (one generator in lockstep vs a stream per iteration), the same distribution
+    scalar = sweeper.simulate_point(n, m, ITERATIONS, seed_base=SEED, engine='scalar', strategy=strategy)
+    batch = sweeper.simulate_point(n, m, ITERATIONS, seed_base=SEED, engine='batch', strategy=strategy)
+    assert _z(scalar[1], batch[1], ITERATIONS) < 4
+    assert batch[0] == round(batch[1] * ITERATIONS)
+
+
+@pytest.mark.parametrize('n, m', [(8, 8), (64, 80), (256, 20)])
+def test_batch_matches_exact(n, m):
+    exact = solve_martingale(n, m)
+    wins, prob, _ = sweeper.simulate_point(n, m, ITERATIONS, seed_base=SEED, engine='batch')
+    se = math.sqrt(exact['prob_win'] * (1 - exact['prob_win']) / ITERATIONS)
+    assert abs(prob - exact['prob_win']) < 4 * se
+
+
+def test_batch_is_reproducible_per_seed():
+    first = sweeper.simulate_point(64, 80, 500, seed_base=SEED, engine='batch')
+    again = sweeper.simulate_point(64, 80, 500, seed_base=SEED, engine='batch')
+    other = sweeper.simulate_point(64, 80, 500, seed_base=SEED + 1, engine='batch')
+    assert first == again
+    assert first != other
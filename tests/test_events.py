@@ -0,0 +1,42 @@
+# test_events.py
+"""The events engine against scalar replay of the same sequence (strats.events)."""
+
+import numpy as np
+import pytest
+
+import sweeper
+from strats import replay
+
+SEQUENCE_LENGTH = 20_000
+ITERATIONS = 40
+
+
+@pytest.fixture(scope='module')
+def outcomes():
+    return np.random.default_rng(5).integers(0, 38, size=SEQUENCE_LENGTH, dtype=np.uint8)
+
+
+@pytest.mark.parametrize('bet_spec', ['red', '1st12'])
+@pytest.mark.parametrize('n, m', [(1, 1), (16, 80), (100, 20), (256, 300)])
+@pytest.mark.parametrize('mode', ['fixed', 'strided', 'bootstrap'])
+def test_events_matches_scalar_replay(outcomes, bet_spec, n, m, mode):
+    iterations = 1 if mode == 'fixed' else ITERATIONS
+    block_size = 500
+    starts = None if mode == 'fixed' else replay.replay_starts(mode, len(outcomes), iterations, seed=3, block_size=block_size)
+    kwargs = dict(bet_spec=bet_spec, outcomes=outcomes, replay_starts=starts, block_size=block_size)
+    scalar = sweeper.simulate_point(n, m, iterations, engine='scalar', **kwargs)
+    events = sweeper.simulate_point(n, m, iterations, engine='events', **kwargs)
+    assert events[0] == scalar[0]
+    assert events[1] == pytest.approx(scalar[1])
+    assert events[2] == pytest.approx(scalar[2], abs=1e-9)
+
+
+def test_events_continues_from_first_iteration(outcomes):
+    # An extended (cached) point runs iterations k.. on their own; the parts add up to one run
+    starts = replay.replay_starts('random', len(outcomes), ITERATIONS, seed=3)
+    kwargs = dict(outcomes=outcomes, replay_starts=starts, engine='events')
+    whole = sweeper.simulate_point(64, 40, ITERATIONS, **kwargs)
+    head = sweeper.simulate_point(64, 40, 15, **kwargs)
+    tail = sweeper.simulate_point(64, 40, ITERATIONS - 15, first_iteration=15, **kwargs)
+    assert head[0] + tail[0] == whole[0]
+    assert (head[2] * 15 + tail[2] * (ITERATIONS - 15)) / ITERATIONS == pytest.approx(whole[2])
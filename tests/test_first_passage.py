@@ -0,0 +1,59 @@
+# test_first_passage.py
+"""One first-passage session per iteration against one session per target (strats.first_passage)."""
+
+import numpy as np
+import pytest
+
+import sweeper
+from game_engine import roulette
+from strats import first_passage
+from strats import replay
+from strats.martingale import run_strategy
+
+BUYOUTS = (1, 10, 40, 80, 300)
+ITERATIONS = 30
+SEED = 9
+
+
+@pytest.fixture(scope='module')
+def outcomes():
+    return np.random.default_rng(2).integers(0, 38, size=20_000, dtype=np.uint8)
+
+
+@pytest.mark.parametrize('strategy', ['martingale', 'fibonacci', 'dalembert', 'labouchere'])
+@pytest.mark.parametrize('n', [8, 64, 256])
+def test_replay_matches_per_target_sweep(outcomes, strategy, n):
+    # Sequence replay: exactly the uniform sweep's numbers, target by target
+    starts = replay.replay_starts('random', len(outcomes), ITERATIONS, seed=SEED)
+    wins, return_sums = first_passage.simulate_targets(
+        n, BUYOUTS, ITERATIONS, outcomes=outcomes, replay_starts=starts, strategy=strategy,
+    )
+    for k, buyout in enumerate(BUYOUTS):
+        expected = sweeper.simulate_point(n, buyout, ITERATIONS, outcomes=outcomes, replay_starts=starts, strategy=strategy)
+        assert wins[k] == expected[0]
+        assert return_sums[k] / ITERATIONS == pytest.approx(expected[2], abs=1e-9)
+
+
+@pytest.mark.parametrize('strategy', ['martingale', 'labouchere'])
+def test_live_streams_match_per_target_sessions(strategy):
+    # Live RNG: each target's own session on the shared (n, 'first_passage') stream ends the same way
+    n = 32
+    wins, return_sums = first_passage.simulate_targets(n, BUYOUTS, ITERATIONS, seed_base=SEED, strategy=strategy)
+    for k, buyout in enumerate(BUYOUTS):
+        won, total = 0, 0.0
+        for i in range(ITERATIONS):
+            spin_rng = roulette.get_rng(SEED, stream=((n, 'first_passage'), i))
+            result = run_strategy(strategy, n, buyout, rng=spin_rng, keep_rows=False)
+            won += result['outcome_label'] == 'SUCCESS'
+            total += result['final_balance'] - n
+        assert wins[k] == won
+        assert return_sums[k] == pytest.approx(total, abs=1e-9)
+
+
+def test_chunks_add_up_to_one_pass():
+    # The sweeper splits a pass into iteration chunks for the workers
+    whole = first_passage.simulate_targets(16, BUYOUTS, ITERATIONS, seed_base=SEED)
+    head = first_passage.simulate_targets(16, BUYOUTS, 12, seed_base=SEED)
+    tail = first_passage.simulate_targets(16, BUYOUTS, ITERATIONS - 12, seed_base=SEED, first_iteration=12)
+    assert (head[0] + tail[0]).tolist() == whole[0].tolist()
+    assert np.allclose(head[1] + tail[1], whole[1])
@@ -0,0 +1,48 @@
+# test_importance.py
+"""Importance-sampled estimates against the exact Markov-chain solve (strats.exact)."""
+
+import math
+
+import pytest
+
+from strats import importance
+from strats.exact import solve_martingale
+
+ITERATIONS = 2000
+SEED = 11
+
+
+@pytest.mark.parametrize('n, m, tilt', [
+    (8, 200, 0.5),    # rare success
+    (512, 4, 0.35),   # rare bust
+    (1024, 2, 0.35),  # rarer bust
+])
+def test_matches_exact_at_rare_event_points(n, m, tilt):
+    exact = solve_martingale(n, m)
+    result = importance.simulate_point(n, m, ITERATIONS, tilt, seed=SEED)
+    assert not importance.problems(result, importance.target_event('red', tilt))
+    assert result[10] == 0.0
+    assert abs(result[1] - exact['prob_win']) < 4 * result[4]
+    assert abs(result[6] - exact['prob_bust']) < 4 * result[7]
+    assert abs(result[2] - exact['expected_return']) < 4 * result[5]
+
+
+def test_probabilities_are_complementary_and_bounded():
+    result = importance.simulate_point(1024, 2, ITERATIONS, 0.35, seed=SEED)
+    assert 0.0 <= result[1] <= 1.0 and 0.0 <= result[6] <= 1.0
+    assert result[1] + result[6] == pytest.approx(1.0)
+
+
+def test_overtilted_point_is_flagged():
+    # Tilt 0.6 at N=8, M=200 leaves Prob_Win many SE below the exact value; it must not pass silently
+    result = importance.simulate_point(8, 200, ITERATIONS, 0.6, seed=SEED)
+    assert result[10] == 1.0
+    assert importance.problems(result, 'win')
+
+
+def test_fair_tilt_has_unit_weights():
+    stream = importance.TiltedStream(importance.tilted_wheel('red', 18 / 38), seed=1, point=(1,), index=0)
+    for _ in range(500):
+        stream.randint(0, 37)
+    stream.spins(100)
+    assert math.isclose(stream.log_weight, 0.0, abs_tol=1e-9)
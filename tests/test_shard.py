@@ -0,0 +1,56 @@
+# test_shard.py
+"""Sharded sweeps merged back together against a single-node run (strats.shard)."""
+
+import os
+
+import pytest
+
+import sweeper
+
+SHARDS = 3
+SEQUENCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sequences', 'roulette_sequence_10000.csv')
+
+
+def _options(out_dir, **overrides):
+    return sweeper.SweepOptions(
+        iterations=24,
+        seed_base=11,
+        n_values=[8, 32, 128],
+        m_values=[10, 40],
+        progress_every=10**9,
+        out_dir=str(out_dir),
+        **overrides,
+    )
+
+
+def _read(paths):
+    contents = []
+    for path in paths:
+        with open(path) as f:
+            contents.append(f.read())
+    return contents
+
+
+@pytest.mark.parametrize('overrides', [
+    {},  # live scalar: iterations are split across shards
+    {'engine': 'batch'},  # whole points per shard
+    {'sequence_path': SEQUENCE, 'replay_mode': 'strided', 'engine': 'events'},
+], ids=['scalar', 'batch', 'events-replay'])
+def test_merged_shards_match_single_node(tmp_path, capsys, overrides):
+    single = sweeper.run_assignment(_options(tmp_path / 'single', **overrides))
+    shard_files = []
+    for i in range(1, SHARDS + 1):
+        shard_files += sweeper.run_assignment(_options(tmp_path / f'shard{i}', shard=(i, SHARDS), **overrides))
+    merged = sweeper.merge_shards(shard_files, out_dir=str(tmp_path / 'merged'))
+    capsys.readouterr()
+    assert [os.path.basename(p) for p in merged] == [os.path.basename(p) for p in single]
+    assert _read(merged) == _read(single)
+
+
+def test_merge_rejects_a_missing_shard(tmp_path, capsys):
+    shard_files = []
+    for i in (1, 2):
+        shard_files += sweeper.run_assignment(_options(tmp_path, shard=(i, SHARDS)))
+    capsys.readouterr()
+    with pytest.raises(ValueError):
+        sweeper.merge_shards(shard_files, out_dir=str(tmp_path / 'merged'))